@@ -0,0 +1,125 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+
+class AsyncEvolution:
+    """
+    Classe faisant évoluer un GeneticAlgo depuis une boucle asyncio (interface graphique, serveur web...) :
+    chaque génération est calculée dans un thread à part (GeneticAlgo.generations), la boucle reste libre entre-temps.
+    L'évolution peut être mise en pause, reprise, arrêtée ou changer de paramètres entre deux générations.
+    Utilisation : async for report in AsyncEvolution(ga): ...
+    """
+    def __init__(self, algo, executor=None):
+        """ constructeur de AsyncEvolution
+        Args:
+            algo (GeneticAlgo): algorithme génétique à faire évoluer
+            executor (Executor): exécuteur des générations (None pour un thread dédié)
+                les générations sont toujours calculées l'une après l'autre
+        """
+        self.algo = algo
+        self.own_executor = executor is None
+        self.executor = ThreadPoolExecutor(max_workers=1) if executor is None else executor
+        self.iterator = None # générateur GeneticAlgo.generations, créé à la première génération
+        self.running = asyncio.Event() # levé quand l'évolution n'est pas en pause
+        self.running.set()
+        self.stopped = False
+        self.parameters = {} # paramètres à appliquer avant la prochaine génération
+
+    def pause(self):
+        """
+        met l'évolution en pause après la génération en cours
+        """
+        self.running.clear()
+
+    def resume(self):
+        """
+        reprend l'évolution mise en pause
+        """
+        self.running.set()
+
+    def stop(self):
+        """
+        arrête l'évolution après la génération en cours (la population reste prête pour une reprise)
+        """
+        self.stopped = True
+        self.running.set()
+
+    def set_parameters(self, **parameters):
+        """
+        change des paramètres de l'algorithme (voir GeneticAlgo.set_parameters)
+        ils sont appliqués entre deux générations, jamais pendant le calcul d'une génération
+        Args:
+            **parameters: nouvelles valeurs des paramètres
+        """
+        self.parameters.update(parameters)
+
+    def is_paused(self):
+        """
+        renvoie True si l'évolution est en pause
+
+        Returns:
+            bool: True si l'évolution est en pause
+        """
+        return not self.running.is_set()
+
+    async def step(self):
+        """
+        calcule la génération suivante (après une éventuelle pause)
+        Returns:
+            GenerationReport: résumé de la génération (None si l'évolution est terminée ou arrêtée)
+        """
+        await self.running.wait()
+        if self.stopped:
+            await self.finish()
+            return None
+        if self.parameters:
+            # aucune génération n'est en cours ici : les paramètres ne changent pas pendant un calcul
+            parameters, self.parameters = self.parameters, {}
+            self.algo.set_parameters(**parameters)
+        if self.iterator is None:
+            self.iterator = self.algo.generations()
+        loop = asyncio.get_running_loop()
+        report = await loop.run_in_executor(self.executor, next, self.iterator, None)
+        if report is None or report.reason is not None:
+            self.stopped = True
+            await self.finish()
+        return report
+
+    async def run(self, callback=None):
+        """
+        fait évoluer la population jusqu'à la fin (ou jusqu'à stop)
+        Args:
+            callback (function): fonction appelée avec chaque GenerationReport (None pour aucune)
+        Returns:
+            Runner: le meilleur runner de la dernière génération évaluée
+        """
+        async for report in self:
+            if callback is not None:
+                callback(report)
+        return self.algo.get_best_runner()
+
+    async def finish(self):
+        """
+        termine le générateur (fin de l'instrumentation, attente de la dernière sauvegarde)
+        """
+        if self.iterator is not None:
+            iterator, self.iterator = self.iterator, None
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self.executor, iterator.close)
+
+    async def close(self):
+        """
+        termine le générateur et libère le thread dédié
+        """
+        await self.finish()
+        if self.own_executor:
+            self.executor.shutdown(wait=True)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        report = await self.step()
+        if report is None:
+            raise StopAsyncIteration
+        return report
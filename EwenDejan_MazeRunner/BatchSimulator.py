@@ -0,0 +1,191 @@
+import numpy as np
+
+
+# bit de chaque cellule dans son octet de la grille des cellules visitées (8 cellules par octet)
+CELL_BITS = np.left_shift(1, np.arange(8)).astype(np.uint8)
+
+class BatchSimulator:
+    """
+    Classe simulant le parcours de toute une population de runners en même temps.
+    Au lieu d'appeler Runner.journey runner par runner, on fait avancer tous les runners
+    d'un pas à la fois avec des opérations numpy sur la grille des murs du labyrinthe.
+    """
+    def __init__(self, maze, goal:tuple=None):
+        """ constructeur de BatchSimulator
+        Args:
+            maze (Maze): labyrinthe parcouru
+            goal (tuple (int, int)): arrivée visée (None pour l'arrivée du labyrinthe)
+        """
+        self.maze = maze
+        self.goal = goal
+        self.size = maze.get_size()
+        # on travaille sur une grille avec une bordure de murs (pas besoin de tester les bords)
+        self.width = self.size + 2
+        cardinal = maze.get_cardinal()
+        self.moves = np.array([cardinal[direction] for direction in range(8)], dtype=np.int64)
+        # déplacement dans la grille aplatie pour chaque direction
+        self.offsets = self.moves[:, 0] * self.width + self.moves[:, 1]
+        self.visited = None # cellules visitées par chaque runner, un bit par cellule (réutilisée d'un appel à l'autre)
+
+    def set_goal(self, goal:tuple):
+        """
+        définit l'arrivée visée
+        Args:
+            goal (tuple (int, int)): arrivée visée (None pour l'arrivée du labyrinthe)
+        """
+        self.goal = goal
+
+    def open_cells(self):
+        """
+        construit la grille aplatie des cellules accessibles (avec la bordure de murs)
+        la grille est reconstruite à chaque appel car les phéromones bouchent des cellules
+
+        Returns:
+            np.ndarray: tableau de booléens (True si la cellule n'est pas un mur)
+        """
+        grid = np.zeros((self.width, self.width), dtype=bool)
+        grid[1:-1, 1:-1] = self.maze.map != -1
+        return grid.ravel()
+
+    def flat_index(self, cell:tuple):
+        """
+        renvoie l'indice d'une cellule dans la grille aplatie
+        Args:
+            cell (tuple (int, int)): coordonnées de la cellule
+        Returns:
+            int: indice dans la grille aplatie
+        """
+        return (cell[0] + 1) * self.width + (cell[1] + 1)
+
+    def journey(self, dna:np.ndarray):
+        """
+        fait parcourir le labyrinthe à tous les runners selon leur ADN
+        (même résultat que Runner.journey pour chaque ligne de la matrice)
+        Args:
+            dna (np.ndarray): matrice (pop_size x dna_length) des ADN des runners
+        Returns:
+            tuple: (paths, last_cells, reached_goal, lengths)
+                paths (np.ndarray): matrice (pop_size x dna_length) des chemins parcourus (-1 pour un mur)
+                last_cells (np.ndarray): matrice (pop_size x 2) des dernières cellules atteintes
+                reached_goal (np.ndarray): True pour les runners ayant atteint le but
+                lengths (np.ndarray): longueur du chemin parcouru par chaque runner
+        """
+        result = self.run(dna, track_visits=False)
+        return result["paths"], result["last_cells"], result["reached_goal"], result["lengths"]
+
+    def run(self, dna:np.ndarray, track_visits:bool=True, available:np.ndarray=None, fetch=None, max_length:int=None):
+        """
+        fait parcourir le labyrinthe à tous les runners et compte en même temps
+        les coups dans les murs, les retours en arrière et les découvertes de chaque runner
+        (les cellules visitées sont suivies dans une grille de bits aplatie réutilisée d'un appel à l'autre)
+        avec fetch, les ADN sont prolongés à la demande, comme dans Runner.journey : seuls les gènes lus sont tirés
+        Args:
+            dna (np.ndarray): matrice (pop_size x n) des ADN des runners
+            track_visits (bool): False pour ne faire que le parcours (sans compter les découvertes)
+            available (np.ndarray): nombre de gènes déjà tirés de chaque ADN (les suivants de la matrice sont ignorés)
+            fetch (function): fetch(rows, step) prolonge les ADN des runners rows qui ont lu tous leurs gènes
+                et renvoie (nouveau nombre de gènes tirés de chacun, matrice des gènes à partir de step)
+                None si la matrice contient déjà tous les gènes
+            max_length (int): nombre maximal de pas avec fetch (longueur maximale des ADN)
+        Returns:
+            dict: paths, last_cells, reached_goal, lengths (comme journey),
+                walls, backtracks, discoveries (compteurs par runner),
+                explored (cellules visitées par au moins un runner, None si track_visits est False)
+                et available (nombre de gènes tirés de chaque ADN à la fin du parcours)
+        """
+        dna = np.asarray(dna)
+        pop_size, dna_length = dna.shape
+        if fetch is None:
+            available = np.full(pop_size, dna_length, dtype=np.int64)
+        else:
+            available = np.array(available, dtype=np.int64)
+            dna_length = max_length
+        refill = int(available.min()) if pop_size else dna_length # prochain pas où un ADN doit être prolongé
+        open_cells = self.open_cells()
+        n_cells = open_cells.size
+        start = self.flat_index(self.maze.get_start())
+        goal = self.flat_index(self.maze.get_goal() if self.goal is None else self.goal)
+        # une colonne par pas de temps, contiguë en mémoire
+        genes_by_step = np.ascontiguousarray(dna.T, dtype=np.int64)
+        paths = np.full((pop_size, dna_length), -1, dtype=np.int8)
+        position = np.full(pop_size, start, dtype=np.int64)
+        active = np.ones(pop_size, dtype=bool) # runners encore en chemin
+        reached_goal = np.zeros(pop_size, dtype=bool)
+        lengths = np.full(pop_size, dna_length, dtype=np.int64)
+        walls = np.zeros(pop_size, dtype=np.int64)
+        discoveries = np.zeros(pop_size, dtype=np.int64)
+        if track_visits:
+            # chaque runner a ses propres octets (lignes arrondies à 8 bits) : deux runners n'écrivent jamais le même octet
+            row_bytes = -(-n_cells // 8)
+            visited = self.visited_bitmap(pop_size * row_bytes)
+            row_offset = np.arange(pop_size, dtype=np.int64) * (8 * row_bytes)
+            cells = row_offset + start
+            visited[cells >> 3] |= CELL_BITS[cells & 7] # le départ est déjà visité
+        n_active = pop_size
+        for step in range(dna_length):
+            if step == refill:
+                rows = np.nonzero(active & (available <= step))[0]
+                if len(rows):
+                    new_available, genes = fetch(rows, step)
+                    end = step + genes.shape[1]
+                    if end > len(genes_by_step):
+                        # la matrice grandit par doublement (sans dépasser la longueur maximale)
+                        grown = np.zeros((min(dna_length, max(end, 2*len(genes_by_step))), pop_size), dtype=np.int64)
+                        grown[:len(genes_by_step)] = genes_by_step
+                        genes_by_step = grown
+                    genes_by_step[step:end, rows] = np.asarray(genes).T
+                    available[rows] = new_available
+                remaining = available[active]
+                refill = int(remaining.min()) if remaining.size else dna_length
+            genes = genes_by_step[step]
+            target = position + self.offsets[genes]
+            # le mouvement est valide s'il ne va pas dans un mur (la bordure compte comme un mur)
+            valid = open_cells[target] & active
+            walls += active & ~valid
+            position[valid] = target[valid]
+            paths[valid, step] = genes[valid]
+            if track_visits:
+                cells = row_offset[valid] + position[valid]
+                index, bits = cells >> 3, CELL_BITS[cells & 7]
+                discoveries[valid] += (visited[index] & bits) == 0
+                visited[index] |= bits
+            # les runners qui atteignent le but sont masqués pour la suite
+            arrived = active & (position == goal)
+            if arrived.any():
+                reached_goal |= arrived
+                lengths[arrived] = step + 1
+                active &= ~arrived
+                n_active -= int(arrived.sum())
+                if n_active == 0:
+                    break
+        explored = None
+        if track_visits:
+            # union des bits de tous les runners, puis un booléen par cellule
+            union = np.bitwise_or.reduce(visited.reshape(pop_size, row_bytes), axis=0) if pop_size else np.zeros(row_bytes, dtype=np.uint8)
+            explored = np.unpackbits(union, count=n_cells, bitorder="little").reshape(self.width, self.width)[1:-1, 1:-1].astype(bool)
+        return {
+            "paths": paths,
+            "last_cells": np.stack((position // self.width - 1, position % self.width - 1), axis=1),
+            "reached_goal": reached_goal,
+            "lengths": lengths,
+            "walls": walls,
+            "backtracks": lengths - walls - discoveries,
+            "discoveries": discoveries,
+            "explored": explored,
+            "available": available,
+        }
+
+    def visited_bitmap(self, n:int):
+        """
+        renvoie la grille de bits des cellules visitées remise à zéro (8 cellules par octet)
+        (allouée une seule fois puis réutilisée tant que la taille ne change pas)
+        Args:
+            n (int): nombre d'octets (pop_size x octets d'une grille aplatie)
+        Returns:
+            np.ndarray: tableau de n octets à 0
+        """
+        if self.visited is None or self.visited.size != n:
+            self.visited = np.zeros(n, dtype=np.uint8)
+        else:
+            self.visited.fill(0)
+        return self.visited
@@ -0,0 +1,141 @@
+from time import perf_counter
+
+
+class EvolutionController:
+    """
+    Classe décidant, après chaque génération, si l'évolution doit s'arrêter
+    (but atteint, plus d'amélioration depuis patience générations, temps ou nombre d'évaluations épuisé)
+    et adaptant le taux de mutation quand la meilleure fitness stagne.
+    Tous les critères sont désactivés par défaut : sans critère, GeneticAlgo.evolution va jusqu'à max_generations.
+    """
+    def __init__(self, stop_on_goal:bool=False, patience:int=None, min_delta:float=0, time_budget:float=None,
+                 evaluation_budget:int=None, stagnation:int=None, mutation_boost:float=2.0, max_mutation_rate:float=0.5):
+        """ constructeur de EvolutionController
+        Args:
+            stop_on_goal (bool): True pour s'arrêter dès que le meilleur runner atteint le but
+            patience (int): nombre de générations sans amélioration avant de s'arrêter (None pour désactiver)
+            min_delta (float): baisse minimale de la meilleure fitness comptée comme une amélioration
+            time_budget (float): durée maximale de l'évolution en secondes (None pour désactiver)
+            evaluation_budget (int): nombre maximal de runners évalués (None pour désactiver)
+            stagnation (int): nombre de générations sans amélioration avant d'augmenter le taux de mutation
+                (None pour garder le taux de mutation fixe)
+            mutation_boost (float): facteur appliqué au taux de mutation à chaque stagnation
+            max_mutation_rate (float): taux de mutation maximal
+        """
+        self.stop_on_goal = stop_on_goal
+        self.patience = patience
+        self.min_delta = min_delta
+        self.time_budget = time_budget
+        self.evaluation_budget = evaluation_budget
+        self.stagnation = stagnation
+        self.mutation_boost = mutation_boost
+        self.max_mutation_rate = max_mutation_rate
+        self.reset()
+
+    def start(self):
+        """
+        commence une évolution (appelé par GeneticAlgo.generations) : les compteurs sont remis à zéro,
+        sauf si une évolution interrompue entre deux générations reprend
+        """
+        if not self.running:
+            self.reset()
+            self.running = True
+
+    def finish(self):
+        """
+        termine l'évolution en cours (la prochaine évolution repartira de compteurs à zéro)
+        """
+        self.running = False
+
+    def reset(self):
+        """
+        remet à zéro les compteurs
+        """
+        self.running = False # True entre le début et la fin d'une évolution
+        self.start_time = perf_counter()
+        self.evaluations = 0
+        self.best_fitness = float('inf')
+        self.stalled = 0 # générations sans amélioration
+        self.base_mutation_rate = None # taux de mutation de départ (retrouvé après une amélioration)
+        self.reason = None # raison de l'arrêt
+
+    def update(self, ga, best_runner):
+        """
+        prend en compte la génération qui vient d'être évaluée
+        Args:
+            ga (GeneticAlgo): algorithme génétique (son taux de mutation peut être modifié)
+            best_runner (Runner): meilleur runner de la génération
+        Returns:
+            bool: True si l'évolution doit s'arrêter (la raison est dans self.reason)
+        """
+        if self.base_mutation_rate is None:
+            self.base_mutation_rate = ga.mutation_rate
+        self.evaluations += ga.pop_size
+        fitness = best_runner.get_fitness()
+        if fitness < self.best_fitness - self.min_delta:
+            self.best_fitness = fitness
+            self.stalled = 0
+            ga.mutation_rate = self.base_mutation_rate # la recherche repart, on revient au taux de départ
+        else:
+            self.best_fitness = min(self.best_fitness, fitness)
+            self.stalled += 1
+            if self.stagnation and self.stalled % self.stagnation == 0:
+                ga.mutation_rate = min(self.max_mutation_rate, ga.mutation_rate * self.mutation_boost)
+        if self.stop_on_goal and best_runner.is_goal_reached():
+            self.reason = "goal"
+        elif self.patience is not None and self.stalled >= self.patience:
+            self.reason = "patience"
+        elif self.time_budget is not None and perf_counter() - self.start_time >= self.time_budget:
+            self.reason = "time"
+        elif self.evaluation_budget is not None and self.evaluations >= self.evaluation_budget:
+            self.reason = "evaluations"
+        return self.reason is not None
+
+    def get_state(self):
+        """
+        renvoie l'état de l'évolution en cours (pour GeneticAlgo.save_snapshot)
+
+        Returns:
+            dict: compteurs, meilleure fitness, taux de mutation de départ et temps déjà écoulé (sérialisable en JSON)
+        """
+        return {
+            "running": self.running,
+            "elapsed": perf_counter() - self.start_time,
+            "evaluations": self.evaluations,
+            "best_fitness": self.best_fitness,
+            "stalled": self.stalled,
+            "base_mutation_rate": self.base_mutation_rate,
+            "reason": self.reason,
+        }
+
+    def set_state(self, state:dict):
+        """
+        restaure l'état renvoyé par get_state (pour GeneticAlgo.load_snapshot) :
+        l'évolution reprend sans remettre les compteurs à zéro, le budget de temps compte le temps déjà écoulé
+        Args:
+            state (dict): état de l'évolution
+        """
+        self.running = state["running"]
+        self.start_time = perf_counter() - state["elapsed"]
+        self.evaluations = state["evaluations"]
+        self.best_fitness = state["best_fitness"]
+        self.stalled = state["stalled"]
+        self.base_mutation_rate = state["base_mutation_rate"]
+        self.reason = state["reason"]
+
+    def set_base_mutation_rate(self, mutation_rate:float):
+        """
+        définit le taux de mutation retrouvé après une amélioration (quand le taux est changé pendant l'évolution)
+        Args:
+            mutation_rate (float): taux de mutation
+        """
+        self.base_mutation_rate = mutation_rate
+
+    def get_reason(self):
+        """
+        renvoie la raison de l'arrêt de l'évolution
+
+        Returns:
+            str: "goal", "patience", "time", "evaluations" ou None si l'évolution est allée jusqu'au bout
+        """
+        return self.reason
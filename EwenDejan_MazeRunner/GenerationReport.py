@@ -0,0 +1,57 @@
+import numpy as np
+
+
+class GenerationReport:
+    """
+    Classe résumant une génération terminée (renvoyée par GeneticAlgo.generations) :
+    statistiques, chemin du meilleur runner et raison de l'arrêt éventuel.
+    Elle ne garde aucune référence vers les runners : elle reste valable pendant les générations suivantes.
+    """
+    __slots__ = ("generation", "best_fitness", "avg_fitness", "avg_length", "path", "reached_goal", "reason")
+
+    def __init__(self, generation:int, best_fitness:float, avg_fitness:float, avg_length:float, path:np.ndarray,
+                 reached_goal:bool, reason:str=None):
+        """ constructeur de GenerationReport
+        Args:
+            generation (int): numéro de la génération
+            best_fitness (float): fitness du meilleur runner
+            avg_fitness (float): fitness moyenne de la population
+            avg_length (float): longueur moyenne des chemins parcourus
+            path (np.ndarray): coordonnées (k x 2) des cellules parcourues par le meilleur runner
+            reached_goal (bool): True si le meilleur runner a atteint le but
+            reason (str): raison de l'arrêt de l'évolution après cette génération (None si elle continue)
+        """
+        self.generation = generation
+        self.best_fitness = best_fitness
+        self.avg_fitness = avg_fitness
+        self.avg_length = avg_length
+        self.path = path
+        self.reached_goal = reached_goal
+        self.reason = reason
+
+    def to_dict(self):
+        """
+        renvoie le résumé sous forme de dict (sérialisable en JSON, pour un tableau de bord par exemple)
+
+        Returns:
+            dict: résumé de la génération (le chemin est une liste de [x, y])
+        """
+        return {
+            "generation": self.generation,
+            "best_fitness": self.best_fitness,
+            "avg_fitness": self.avg_fitness,
+            "avg_length": self.avg_length,
+            "path": self.path.tolist(),
+            "reached_goal": self.reached_goal,
+            "reason": self.reason,
+        }
+
+    def __repr__(self):
+        """
+        renvoie une chaîne de caractères représentant le résumé
+
+        Returns:
+            str: chaîne de caractères représentant le résumé
+        """
+        return (f"GenerationReport(generation={self.generation}, best_fitness={self.best_fitness}, "
+                f"avg_fitness={self.avg_fitness}, reached_goal={self.reached_goal})")
@@ -1,7 +1,23 @@
-from Runner import Runner
+from Runner import Runner, GENE_BLOCK
+from GenomeStore import GenomeStore
+from BatchSimulator import BatchSimulator
+from Selection import Selection
+from Reproduction import Reproduction
+from ParallelEvaluator import ParallelEvaluator
+from MetricsSink import MetricsSink
+from EvolutionController import EvolutionController
+from GenerationReport import GenerationReport
 import matplotlib.pyplot as plt
+import numpy as np
 import random as rd
+import json
 import math
+import os
+import tempfile
+from array import array
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
 
 
 # fitness penalties and reward
@@ -12,11 +28,17 @@ LENGTH_PENALTY = 1
 GOAL_REACHED_BONUS = -100
 DISCOVERY_BONUS = -2
 
+# modes de parcours de la population
+EVALUATION_MODES = ("sequential", "fused", "batch", "parallel")
+
+# paramètres modifiables entre deux générations (voir set_parameters)
+PARAMETERS = ("mutation_rate", "selection_rate", "max_generations", "snapshot_interval")
+
 class GeneticAlgo:
     """
     Classe représentant un algorithme génétique.
     """
-    def __init__(self, maze, runner_length:int, pop_size:int, max_generations:int, mutation_rate:float, selection_rate:float):
+    def __init__(self, maze, runner_length:int, pop_size:int, max_generations:int, mutation_rate:float, selection_rate:float, evaluation:str="sequential", selection_strategy:str="truncation", tournament_size:int=3, n_workers:int=None, checkpoint_interval:int=0, goal:tuple=None, metrics:MetricsSink=None, snapshot_path:str=None, snapshot_interval:int=0, controller:EvolutionController=None, crossover_strategy:str="one_point"):
         """ constructeur de GeneticAlgo
         Args:
             maze (Maze): labyrinthe utilisé
@@ -25,20 +47,87 @@ class GeneticAlgo:
             max_generations (int): nombre maximum de générations
             mutation_rate (float): taux de mutation
             selection_rate (float): taux de sélection
+            evaluation (str): mode de parcours de la population
+                "sequential" (Runner.journey puis fitness runner par runner),
+                "fused" (parcours et fitness en une seule passe, runner par runner)
+                "batch" (parcours et fitness de toute la population d'un coup)
+                ou "parallel" (comme "batch" mais réparti sur plusieurs processus)
+            selection_strategy (str): stratégie de sélection ("truncation", "tournament" ou "roulette")
+            tournament_size (int): nombre de runners par tournoi (stratégie "tournament")
+            n_workers (int): nombre de processus du mode "parallel" (None pour un processus par coeur)
+            checkpoint_interval (int): mode "fused", écart entre deux points de reprise de la simulation
+                (les enfants reprennent la simulation du parent au niveau du croisement), 0 pour désactiver
+            goal (tuple (int, int)): arrivée visée, None pour l'arrivée du labyrinthe
+                (les distances des autres arrivées sont lues dans le cache du labyrinthe)
+            metrics (MetricsSink): destination des statistiques de chaque génération
+                (None pour toutes les garder en mémoire)
+            snapshot_path (str): fichier où evolution sauvegarde l'état complet de l'algorithme (voir save_snapshot)
+            snapshot_interval (int): nombre de générations entre deux sauvegardes, 0 pour désactiver
+            controller (EvolutionController): critères d'arrêt anticipé et adaptation du taux de mutation
+                (None pour aller jusqu'à max_generations)
+            crossover_strategy (str): opérateur de croisement ("one_point", "two_point" ou "uniform")
         """
+        if evaluation not in EVALUATION_MODES:
+            raise ValueError(f"mode d'évaluation inconnu : {evaluation}")
+        if snapshot_interval and snapshot_path is None:
+            raise ValueError("snapshot_interval demande un snapshot_path")
         self.maze = maze
         self.pop_size = pop_size
         self.mutation_rate = mutation_rate
         self.selection_rate = selection_rate
         self.max_generations = max_generations
-        # initialise la population
-        self.population = [Runner(maze.get_start(), runner_length) for i in range(pop_size)]
-        self.explorated = set() # enregistre les cellules explorées pour les pheromones
+        self.evaluation = evaluation
+        # distances Dijkstra vers l'arrivée visée (calculées une seule fois par le labyrinthe)
+        if goal is None:
+            self.goal = maze.get_goal()
+            self.distances = maze.map
+        else:
+            self.goal = (int(goal[0]), int(goal[1]))
+            self.distances = maze.distance_field(goal)
+        self.simulator = BatchSimulator(maze, self.goal) if evaluation == "batch" else None
+        self.runner_length = runner_length
+        self.n_workers = n_workers
+        self.parallel_evaluator = None # créé à la première génération (mode "parallel")
+        # initialise la population (tous les ADN sont rangés dans la même matrice, élargie au fur et à mesure des gènes tirés)
+        self.store = GenomeStore(pop_size, min(GENE_BLOCK, runner_length), runner_length)
+        self.population = [Runner(maze.get_start(), runner_length, self.store) for i in range(pop_size)]
+        # sélection, puis croisements et mutations de tous les enfants d'une génération d'un coup
+        # (graines tirées avec random pour qu'une graine de random suffise à rejouer l'évolution)
+        self.selector = Selection(selection_strategy, tournament_size, rd.getrandbits(64))
+        self.reproducer = Reproduction(crossover_strategy, rd.getrandbits(64))
+        self.fitness_values = None # fitness de la population triée (remplie par tri_population)
+        # cellules explorées par au moins un runner (grille aplatie avec une bordure, 1 si explorée)
+        # et cellules découvertes depuis les dernières phéromones (les seules vérifiées par apply_pheromones)
+        self.width = maze.get_size() + 2
+        self.offsets = [move[0]*self.width + move[1] for move in maze.get_cardinal().values()]
+        self.explored = bytearray(self.width*self.width)
+        self.explored_view = np.frombuffer(self.explored, dtype=np.uint8).reshape(self.width, self.width)
+        self.explored_delta = array("q")
+        # pour le mode "fused" : grille aplatie des cellules visitées, réutilisée d'un runner à l'autre
+        # (une cellule est visitée par le runner courant si sa case vaut visit_stamp)
+        self.visited = None
+        self.visited_view = None
+        self.visit_stamp = 0
+        self.open_cells = None
+        self.open_view = None
+        # pour le mode "fused" : points de reprise tous les checkpoint_interval gènes (0 pour désactiver)
+        self.checkpoint_interval = checkpoint_interval
 
-        # pour les stats
-        self.best_fitness_history = []
-        self.fitness_avg_history = []
-        self.length_history = []
+        # chronométrage des phases (None pour ne rien mesurer) et coups dans les murs de la dernière génération
+        self.instrumentation = None
+        self.wall_hits = 0
+
+        # pour les stats (meilleure fitness, fitness moyenne et longueur moyenne de chaque génération)
+        self.metrics = metrics if metrics is not None else MetricsSink()
+
+        # sauvegardes de l'état complet, écrites par un thread pour ne pas bloquer les générations
+        self.generation = 0 # nombre de générations terminées (sélection et reproduction comprises)
+        self.snapshot_path = snapshot_path
+        self.snapshot_interval = snapshot_interval
+        self.snapshot_writer = None
+        self.pending_snapshot = None
+        self.controller = controller
+        self.best_runner = None # meilleur runner de la dernière génération évaluée
 
 
     def fitness(self, runner:Runner):
@@ -56,6 +145,7 @@ class GeneticAlgo:
         visited.add((current_x, current_y))
         for move in runner.get_path():
             if move == -1: # mouvement dans un mur -> penalité du mur + penalité d'immobilité (mm case)
+                self.wall_hits += 1
                 fitness += WALL_PENALTY
                 fitness += BACKTRACK_PENALTY
             else:
@@ -72,7 +162,7 @@ class GeneticAlgo:
         last_cell = runner.get_last_cell()
         # j'ai essayé avec la distance euclidienne mais ca marchait (bcp) moins bien qu'avec les distances de dijkstra
         # dist = math.sqrt((last_cell[0] - self.maze.get_goal()[0])**2 + (last_cell[1] - self.maze.get_goal()[1])**2)
-        dist = self.maze.get_dijkstra_distance(last_cell[0], last_cell[1])
+        dist = int(self.distances[last_cell[0]][last_cell[1]])
         fitness += dist * DISTANCE_PENALTY
         # longueur du chemin parcouru (on cherche le chemin le plus court)
         fitness += len(runner.get_path()) * LENGTH_PENALTY
@@ -81,7 +171,136 @@ class GeneticAlgo:
             fitness += GOAL_REACHED_BONUS
 
         runner.set_fitness(fitness)
-        self.explorated = self.explorated.union(visited)
+        self.mark_explored((x+1)*self.width + y+1 for x, y in visited)
+
+    @staticmethod
+    def score(walls, backtracks, discoveries, dist, length, reached_goal):
+        """
+        calcule la fitness à partir des compteurs du parcours (même barème que fitness)
+        fonctionne avec des entiers ou des tableaux numpy (un élément par runner)
+        Args:
+            walls: nombre de mouvements dans un mur
+            backtracks: nombre de retours sur une case déjà visitée
+            discoveries: nombre de nouvelles cases visitées
+            dist: distance Dijkstra de la dernière cellule atteinte
+            length: longueur du chemin parcouru
+            reached_goal: True si le but est atteint
+        Returns:
+            fitness du ou des runners
+        """
+        fitness = walls * (WALL_PENALTY + BACKTRACK_PENALTY)
+        fitness += backtracks * BACKTRACK_PENALTY
+        fitness += discoveries * DISCOVERY_BONUS
+        fitness += dist * DISTANCE_PENALTY
+        fitness += length * LENGTH_PENALTY
+        fitness += reached_goal * GOAL_REACHED_BONUS
+        return fitness
+
+    def evaluate(self, runner:Runner):
+        """
+        fait parcourir le labyrinthe au runner et calcule sa fitness en une seule passe
+        (même résultat que Runner.journey suivi de fitness)
+        si les points de reprise sont activés, le parcours reprend au dernier point de reprise
+        avant le premier gène modifié (hérité du parent lors du croisement)
+        Args:
+            runner (Runner): runner à évaluer
+        """
+        size = self.maze.get_size()
+        width = size + 2
+        if self.visited is None:
+            self.visited = bytearray(width*width)
+            self.visited_view = np.frombuffer(self.visited, dtype=np.uint8)
+        # un nouveau tampon par runner, la grille n'est remise à zéro que tous les 255 runners
+        self.visit_stamp = self.visit_stamp % 255 + 1
+        if self.visit_stamp == 1:
+            self.visited_view.fill(0)
+        stamp = self.visit_stamp
+        visited = self.visited
+        open_cells = self.open_cells
+        offsets = self.offsets
+        start = runner.get_start()
+        goal = self.goal
+        goal_cell = (goal[0]+1)*width + goal[1]+1
+        cell = (start[0]+1)*width + start[1]+1
+        visited[cell] = stamp
+        explored = self.explored
+        if not explored[cell]:
+            explored[cell] = 1
+            self.explored_delta.append(cell)
+        interval = self.checkpoint_interval
+        checkpoint = self.resume_point(runner) if interval else None
+        if checkpoint is None:
+            step, walls, discoveries = 0, 0, 0
+            path = []
+            discovered = array("i") # cellules découvertes, dans l'ordre
+            checkpoints = [(0, 0, 0, cell)]
+        else:
+            step, walls, discoveries, cell, path, discovered, checkpoints = checkpoint
+            # on marque les cellules déjà découvertes par le préfixe hérité
+            self.visited_view[np.frombuffer(discovered, dtype=np.int32)] = stamp
+        reached_goal = step > 0 and cell == goal_cell
+        # on avance par tranches de interval gènes, un point de reprise à la fin de chaque tranche
+        # (l'ADN est prolongé tranche par tranche, seulement si le runner en a besoin)
+        chunk = interval or GENE_BLOCK
+        max_length = runner.get_max_length()
+        while not reached_goal and step < max_length:
+            end = (step // chunk + 1) * chunk
+            if runner.get_dna_length() < end:
+                runner.extend(end)
+            for direction in runner.row_view()[step:end].tolist():
+                target = cell + offsets[direction]
+                if open_cells[target]:
+                    cell = target
+                    path.append(direction)
+                    if visited[cell] != stamp:
+                        visited[cell] = stamp
+                        discoveries += 1
+                        discovered.append(cell)
+                        if not explored[cell]:
+                            explored[cell] = 1
+                            self.explored_delta.append(cell)
+                else:
+                    path.append(-1)
+                    walls += 1
+                if cell == goal_cell:
+                    reached_goal = True
+                    break
+            step = len(path)
+            checkpoints.append((step, walls, discoveries, cell))
+        if interval:
+            runner.set_checkpoints(path, discovered, checkpoints)
+        last_cell = (cell // width - 1, cell % width - 1)
+        runner.set_path(path)
+        runner.set_last_cell(last_cell)
+        runner.set_reached_goal(reached_goal)
+        dist = int(self.distances[last_cell[0]][last_cell[1]])
+        backtracks = len(path) - walls - discoveries
+        self.wall_hits += walls
+        runner.set_fitness(self.score(walls, backtracks, discoveries, dist, len(path), reached_goal))
+
+    def resume_point(self, runner:Runner):
+        """
+        cherche le dernier point de reprise utilisable pour le runner
+        (avant son premier gène modifié, et dont le préfixe ne passe par aucune cellule bouchée depuis)
+        Args:
+            runner (Runner): runner à évaluer
+        Returns:
+            tuple: (step, walls, discoveries, cell, path, discovered, checkpoints) copiés du préfixe, None si aucun
+        """
+        source = runner.get_resume_source()
+        if source is None:
+            return None
+        path, discovered, checkpoints = source
+        # points de reprise triés par pas croissant, on prend le dernier avant le premier gène modifié
+        k = bisect_right(checkpoints, (runner.get_first_changed(), float('inf'))) - 1
+        step, walls, discoveries, cell = checkpoints[k]
+        if step == 0:
+            return None
+        prefix = np.frombuffer(discovered, dtype=np.int32, count=discoveries)
+        # les phéromones ont pu boucher des cellules du préfixe depuis
+        if not self.open_view[prefix].all():
+            return None
+        return step, walls, discoveries, cell, path[:step], discovered[:discoveries], checkpoints[:k+1]
 
     def run_generation(self):
         """
@@ -89,130 +308,577 @@ class GeneticAlgo:
         Returns:
             Runner: le meilleur runner de la génération
         """
+        probe = self.instrumentation
+        if probe is not None:
+            probe.start_generation()
         # pour les stats (avg fitness et avg length de la gé,nération)
         avg_fitness = 0
         avg_length = 0
+        self.evaluate_population()
+        if probe is not None:
+            probe.count("wall_hits", self.wall_hits)
+            probe.count("goal_reached", sum(runner.is_goal_reached() for runner in self.population))
         for runner in self.population:
-            # fait parcourir le labyrinthe au runner (via l'ADN mais en prenant en compte les obstacles)
-            runner.journey(self.maze)
-            self.fitness(runner)
             avg_fitness += runner.get_fitness()
-            avg_length += len(runner.get_path())
+            avg_length += runner.get_length()
         # pour les stats
         avg_fitness /= self.pop_size
         avg_length /= self.pop_size
-        self.fitness_avg_history.append(avg_fitness)
-        self.length_history.append(avg_length)
+        if probe is not None:
+            start = perf_counter()
         self.tri_population() # tri la population par fitness
-        self.best_fitness_history.append(self.population[0].get_fitness())
+        if probe is not None:
+            probe.record("sorting", perf_counter() - start)
+        self.metrics.append(self.population[0].get_fitness(), avg_fitness, avg_length)
         # renvoie le meilleur runner
         return self.population[0]
     
+    def evaluate_population(self):
+        """
+        fait parcourir le labyrinthe à toute la population (via l'ADN mais en prenant en compte les obstacles)
+        et calcule la fitness de chaque runner selon le mode d'évaluation
+        (avec une instrumentation, le mode "sequential" chronomètre séparément le parcours et la fitness,
+        les autres modes font les deux en une passe chronométrée comme "evaluation")
+        """
+        probe = self.instrumentation
+        if probe is not None:
+            start = perf_counter()
+        self.wall_hits = 0
+        if self.evaluation == "batch":
+            dna, available = self.dna_matrix()
+            result = self.simulator.run(dna, available=available, fetch=self.fetch_genes, max_length=self.runner_length)
+            last_cells = result["last_cells"]
+            dist = self.distances[last_cells[:, 0], last_cells[:, 1]].astype(np.int64)
+            fitness = self.score(result["walls"], result["backtracks"], result["discoveries"], dist, result["lengths"], result["reached_goal"])
+            for k, runner in enumerate(self.population):
+                runner.set_path(result["paths"][k, :result["lengths"][k]].tolist())
+                runner.set_last_cell((int(last_cells[k, 0]), int(last_cells[k, 1])))
+                runner.set_reached_goal(bool(result["reached_goal"][k]))
+                runner.set_fitness(int(fitness[k]))
+            self.merge_explored(result["explored"])
+            self.wall_hits = int(result["walls"].sum())
+        elif self.evaluation == "parallel":
+            if self.parallel_evaluator is None:
+                self.parallel_evaluator = ParallelEvaluator(self.maze, self.pop_size, self.runner_length, GeneticAlgo.score, self.n_workers, goal=self.goal)
+            dna, available = self.dna_matrix()
+            gene_seeds = np.array([runner.get_gene_seed() for runner in self.population], dtype=np.uint64)
+            result = self.parallel_evaluator.evaluate(dna, self.goal, available, gene_seeds)
+            last_cells = result["last_cells"]
+            for k, runner in enumerate(self.population):
+                runner.extend(int(result["available"][k])) # mêmes gènes que ceux tirés par les processus
+                runner.set_path(result["paths"][k, :result["lengths"][k]].tolist())
+                runner.set_last_cell((int(last_cells[k, 0]), int(last_cells[k, 1])))
+                runner.set_reached_goal(bool(result["reached_goal"][k]))
+                runner.set_fitness(int(result["fitness"][k]))
+            self.merge_explored(result["explored"])
+            self.wall_hits = int(result["walls"].sum())
+        elif self.evaluation == "fused":
+            # grille des cellules accessibles (avec une bordure de murs), recalculée à cause des phéromones
+            open_cells = np.zeros((self.maze.get_size()+2, self.maze.get_size()+2), dtype=bool)
+            open_cells[1:-1, 1:-1] = self.maze.map != -1
+            self.open_cells = bytearray(open_cells.ravel().tobytes())
+            self.open_view = np.frombuffer(self.open_cells, dtype=np.uint8)
+            for runner in self.population:
+                self.evaluate(runner)
+        elif probe is None:
+            for runner in self.population:
+                runner.journey(self.maze, self.goal)
+                self.fitness(runner)
+        else:
+            journey_time = fitness_time = 0.0
+            for runner in self.population:
+                begin = perf_counter()
+                runner.journey(self.maze, self.goal)
+                middle = perf_counter()
+                self.fitness(runner)
+                journey_time += middle - begin
+                fitness_time += perf_counter() - middle
+            probe.record("journey", journey_time)
+            probe.record("fitness", fitness_time)
+        if probe is not None and self.evaluation != "sequential":
+            probe.record("evaluation", perf_counter() - start)
+        self.truncate_dna()
+
+    def dna_matrix(self):
+        """
+        construit la matrice des ADN déjà tirés de la population pour les modes "batch" et "parallel"
+        (la suite des ADN est tirée pendant la simulation, seulement pour les runners qui la lisent)
+        Returns:
+            tuple (np.ndarray, np.ndarray): matrice (pop_size x plus grande longueur) des ADN
+                et nombre de gènes tirés de chaque ADN
+        """
+        available = np.array([runner.get_dna_length() for runner in self.population], dtype=np.int64)
+        width = int(available.max()) if len(available) else 0
+        return self.store.gather([runner.get_slot() for runner in self.population], width), available
+
+    def fetch_genes(self, rows:np.ndarray, step:int):
+        """
+        prolonge pendant la simulation "batch" les ADN des runners qui ont lu tous leurs gènes
+        (même règle que Runner.journey : GENE_BLOCK gènes de plus à chaque fois)
+        Args:
+            rows (np.ndarray): indices des runners dans la population
+            step (int): pas de la simulation (nombre de gènes déjà lus)
+        Returns:
+            tuple (np.ndarray, np.ndarray): nouveau nombre de gènes tirés de chaque runner
+                et matrice de leurs gènes à partir de step
+        """
+        runners = [self.population[k] for k in rows.tolist()]
+        for runner in runners:
+            runner.extend(step + GENE_BLOCK)
+        available = np.array([runner.get_dna_length() for runner in runners], dtype=np.int64)
+        genes = self.store.gather([runner.get_slot() for runner in runners], int(available.max()))
+        return available, genes[:, step:]
+
+    def truncate_dna(self):
+        """
+        raccourcit l'ADN des runners qui ont atteint le but à la partie lue pendant le parcours
+        """
+        for runner in self.population:
+            if runner.is_goal_reached():
+                runner.truncate(runner.get_length())
+
     def evolution(self, resume_interval=100):
         """
         fait évoluer la population sur le nombre maximum de générations
+        (ou jusqu'à ce que le contrôleur demande l'arrêt, la population reste alors celle de la dernière évaluation)
         Returns:
             Runner: le meilleur runner de la dernière génération
         """
-        for generation in range(self.max_generations):
-            best_runner = self.run_generation()
-            if (generation+1) % resume_interval == 0: # resume toutes les 100 générations
-                print(f"Generation {generation}: best = {best_runner.get_fitness()}, avg = {self.fitness_avg_history[-1]}, avg length = {self.length_history[-1]}")
-            self.selection() # sélection des meilleurs runners
-            self.reproduction() # reproduction pour remplir la population
-        return best_runner
+        for report in self.generations():
+            if (report.generation+1) % resume_interval == 0: # resume toutes les 100 générations
+                print(f"Generation {report.generation}: best = {report.best_fitness}, avg = {report.avg_fitness}, avg length = {report.avg_length}")
+            if report.reason is not None:
+                print(f"Generation {report.generation}: arrêt ({report.reason})")
+        return self.get_best_runner()
+
+    def generations(self):
+        """
+        fait évoluer la population génération par génération, à la demande de l'appelant :
+        chaque génération est évaluée, puis la population est sélectionnée et reproduite avant d'être résumée
+        entre deux générations l'appelant peut s'arrêter (et reprendre plus tard avec un nouvel appel),
+        ou changer les paramètres (set_parameters) qui servent dès la génération suivante
+        Returns:
+            generator: un GenerationReport par génération (le dernier a une raison si le contrôleur arrête l'évolution)
+        """
+        if self.controller is not None:
+            self.controller.start()
+        try:
+            # reprend à la génération où s'est arrêtée la sauvegarde chargée par load_snapshot (ou l'appel précédent)
+            while self.generation < self.max_generations:
+                generation = self.generation
+                best_runner = self.run_generation()
+                self.best_runner = best_runner
+                reason = None
+                if self.controller is not None and self.controller.update(self, best_runner):
+                    reason = self.controller.get_reason()
+                report = GenerationReport(generation, best_runner.get_fitness(), self.metrics.last("fitness_avg"),
+                                          self.metrics.last("length"), self.maze.path_cells(best_runner.get_start(), best_runner.get_path()),
+                                          best_runner.is_goal_reached(), reason)
+                if reason is not None:
+                    self.controller.finish()
+                    self.end_generation()
+                    yield report
+                    break
+                self.selection() # sélection des meilleurs runners
+                self.reproduction() # reproduction pour remplir la population
+                self.generation = generation + 1
+                if self.snapshot_interval and self.generation % self.snapshot_interval == 0:
+                    self.save_snapshot(self.snapshot_path)
+                # la génération est terminée avant de rendre la main : le temps passé chez l'appelant
+                # (ou en pause avec AsyncEvolution) n'est pas compté dans l'instrumentation
+                self.end_generation()
+                yield report
+            else:
+                if self.controller is not None:
+                    self.controller.finish()
+        finally:
+            self.end_generation()
+            self.wait_snapshot()
+
+    def end_generation(self):
+        """
+        termine l'enregistrement de la génération en cours dans l'instrumentation (s'il y en a une)
+        """
+        if self.instrumentation is not None:
+            self.instrumentation.end_generation()
+
+    def set_parameters(self, **parameters):
+        """
+        change des paramètres de l'algorithme entre deux générations (sans recréer la population)
+        Args:
+            **parameters: nouvelles valeurs de mutation_rate, selection_rate, max_generations ou snapshot_interval
+        """
+        for name in parameters:
+            if name not in PARAMETERS:
+                raise ValueError(f"paramètre inconnu ou non modifiable : {name}")
+        if parameters.get("snapshot_interval") and self.snapshot_path is None:
+            raise ValueError("snapshot_interval demande un snapshot_path")
+        for name, value in parameters.items():
+            setattr(self, name, value)
+        if "mutation_rate" in parameters and self.controller is not None:
+            # sinon le contrôleur remettrait son ancien taux de départ à la prochaine amélioration
+            self.controller.set_base_mutation_rate(parameters["mutation_rate"])
     
+    def close(self):
+        """
+        libère les processus et la mémoire partagée du mode "parallel"
+        et ferme le fichier des statistiques (après la fin de la dernière sauvegarde)
+        """
+        self.wait_snapshot()
+        if self.snapshot_writer is not None:
+            self.snapshot_writer.shutdown()
+            self.snapshot_writer = None
+        self.metrics.close()
+        if self.parallel_evaluator is not None:
+            self.parallel_evaluator.close()
+            self.parallel_evaluator = None
+
+    def save_snapshot(self, path:str, background:bool=True):
+        """
+        sauvegarde l'état complet de l'algorithme entre deux générations (après la reproduction) :
+        ADN de la population (3 bits par gène), fitness, labyrinthe avec ses phéromones,
+        cellules explorées, statistiques, état du contrôleur et états des générateurs aléatoires
+        l'état est copié tout de suite, l'écriture du fichier (.npz) est faite par un thread,
+        le fichier n'apparaît qu'une fois complet
+        Args:
+            path (str): chemin du fichier
+            background (bool): False pour écrire le fichier avant de rendre la main
+        """
+        # les ADN n'ont pas tous la même longueur (tirés à la demande, raccourcis au but)
+        # (les gènes après la longueur de chaque ADN sont ignorés)
+        lengths = np.array([runner.get_dna_length() for runner in self.population], dtype=np.int64)
+        dna = self.store.gather([runner.get_slot() for runner in self.population], int(lengths.max()))
+        py_state = rd.getstate()
+        np_state = np.random.get_state()
+        info = {
+            "generation": self.generation,
+            "mutation_rate": self.mutation_rate,
+            "size": self.maze.get_size(),
+            "start": [int(v) for v in self.maze.get_start()],
+            "goal": [int(v) for v in self.maze.get_goal()],
+            "random_version": py_state[0],
+            "random_gauss": py_state[2],
+            "numpy_pos": int(np_state[2]),
+            "numpy_gauss": [int(np_state[3]), float(np_state[4])],
+            "selection_state": self.selector.rng.bit_generator.state,
+            "reproduction_state": self.reproducer.rng.bit_generator.state,
+        }
+        if self.controller is not None:
+            info["controller"] = self.controller.get_state()
+        arrays = {
+            "info": np.frombuffer(json.dumps(info).encode(), dtype=np.uint8),
+            "dna": GenomeStore.pack(dna),
+            "dna_lengths": lengths,
+            "gene_seeds": np.array([runner.get_gene_seed() for runner in self.population], dtype=np.uint64),
+            "fitness": np.array([runner.get_fitness() for runner in self.population], dtype=np.float64),
+            "grid": np.packbits(self.maze.grid),
+            "map": np.array(self.maze.map),
+            "explored": np.packbits(self.explored_view),
+            "explored_delta": np.array(self.explored_delta, dtype=np.int64),
+            "random_state": np.array(py_state[1], dtype=np.uint32),
+            "numpy_state": np_state[1].copy(),
+        }
+        if self.distances is not self.maze.map:
+            arrays["distances"] = np.array(self.distances)
+        for key, value in self.metrics.get_state().items():
+            arrays["metrics_" + key] = value
+        self.wait_snapshot() # une seule sauvegarde en cours à la fois
+        if not background:
+            GeneticAlgo.write_snapshot(path, arrays)
+            return
+        if self.snapshot_writer is None:
+            self.snapshot_writer = ThreadPoolExecutor(max_workers=1)
+        self.pending_snapshot = self.snapshot_writer.submit(GeneticAlgo.write_snapshot, path, arrays)
+
+    @staticmethod
+    def write_snapshot(path:str, arrays:dict):
+        """
+        écrit une sauvegarde dans un fichier temporaire puis le renomme
+        (nom unique : deux évolutions qui sauvegardent au même endroit ne se gênent pas)
+        Args:
+            path (str): chemin du fichier
+            arrays (dict): tableaux à enregistrer
+        """
+        with tempfile.NamedTemporaryFile("wb", dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp", delete=False) as file:
+            try:
+                np.savez(file, **arrays)
+            except BaseException:
+                file.close()
+                os.remove(file.name)
+                raise
+        os.replace(file.name, path) # le fichier n'apparaît qu'une fois complet
+
+    def wait_snapshot(self):
+        """
+        attend la fin de l'écriture de la sauvegarde en cours (et relance son éventuelle erreur)
+        """
+        if self.pending_snapshot is not None:
+            pending, self.pending_snapshot = self.pending_snapshot, None
+            pending.result()
+
+    def load_snapshot(self, path:str):
+        """
+        restaure l'état sauvegardé par save_snapshot : evolution reprend à la génération suivante
+        et donne exactement la même suite que sans interruption
+        (l'algorithme doit avoir été créé avec les mêmes paramètres et le même labyrinthe de départ)
+        Args:
+            path (str): chemin du fichier
+        """
+        with np.load(path) as data:
+            arrays = {key: data[key] for key in data.files}
+        info = json.loads(arrays["info"].tobytes().decode())
+        n = self.maze.get_size()
+        if info["size"] != n or len(arrays["dna"]) != self.pop_size:
+            raise ValueError(f"{path} ne correspond pas à ce labyrinthe ou à cette taille de population")
+        self.generation = info["generation"]
+        self.mutation_rate = info["mutation_rate"]
+        # population : un runner neuf par ADN (son parcours sera refait à la prochaine génération)
+        lengths = arrays["dna_lengths"]
+        dna = GenomeStore.unpack(arrays["dna"], int(lengths.max()))
+        self.population = []
+        for genes, length, gene_seed, fitness in zip(dna, lengths.tolist(), arrays["gene_seeds"].tolist(), arrays["fitness"].tolist()):
+            runner = Runner(self.maze.get_start(), self.runner_length, self.store, gene_seed)
+            runner.set_dna(genes[:length])
+            runner.set_fitness(int(fitness) if math.isfinite(fitness) else fitness) # inf pour un enfant pas encore évalué
+            self.population.append(runner)
+        self.fitness_values = None
+        # labyrinthe avec ses phéromones
+        self.maze.grid[:] = np.unpackbits(arrays["grid"], count=n*n).reshape(n, n).astype(bool)
+        self.maze.map[:] = arrays["map"]
+        self.maze.update_moves()
+        if "distances" in arrays:
+            self.distances[:] = arrays["distances"]
+        self.explored_view[:] = np.unpackbits(arrays["explored"], count=self.width*self.width).reshape(self.width, self.width)
+        self.explored_delta = array("q", arrays["explored_delta"].tolist())
+        self.metrics.set_state({key[len("metrics_"):]: value for key, value in arrays.items() if key.startswith("metrics_")})
+        # générateurs aléatoires
+        rd.setstate((info["random_version"], tuple(arrays["random_state"].tolist()), info["random_gauss"]))
+        np.random.set_state(("MT19937", arrays["numpy_state"], info["numpy_pos"], *info["numpy_gauss"]))
+        self.selector.rng.bit_generator.state = info["selection_state"]
+        self.reproducer.rng.bit_generator.state = info["reproduction_state"]
+        if self.controller is not None and "controller" in info:
+            # l'évolution reprend là où elle en était (generations ne remet pas le contrôleur à zéro)
+            self.controller.set_state(info["controller"])
+
     def selection(self):
         """
         sélectionne les meilleurs runners pour la reproduction
         """
-        # garde les meilleurs selon le taux de sélection
-        self.population = self.population[:round(self.pop_size*self.selection_rate)]
+        probe = self.instrumentation
+        if probe is not None:
+            start = perf_counter()
+        # garde les runners choisis par la stratégie de sélection selon le taux de sélection
+        if self.fitness_values is None or len(self.fitness_values) != len(self.population):
+            self.fitness_values = np.array([runner.get_fitness() for runner in self.population])
+        chosen = self.selector.select(self.fitness_values, round(self.pop_size*self.selection_rate))
+        survivors = []
+        already_chosen = set()
+        for index in chosen.tolist():
+            runner = self.population[index]
+            # un runner tiré plusieurs fois (tournoi, roulette) est copié
+            survivors.append(runner.copy() if index in already_chosen else runner)
+            already_chosen.add(index)
+        self.population = survivors
+        self.fitness_values = self.fitness_values[chosen]
+        if probe is not None:
+            probe.record("selection", perf_counter() - start)
     
     def reproduction(self):
         """
         fait la reproduction des runners
         """
-        self.apply_pheromones()
-        elite = self.population.copy() # copie des meilleurs pour la reproduction
-        #tant que la population n'est pas remplie
-        while len(self.population) < self.pop_size:
-            # sélection aléatoire de deux parents parmi les meilleurs
-            parent1 = rd.choice(elite)
-            parent2 = rd.choice(elite)
-            child = self.crossover(parent1, parent2) # mix de l'ADN des parents
-            self.mutation(child) # chance pour que l'enfant mute
-            self.population.append(child)
+        probe = self.instrumentation
+        if probe is not None:
+            start = perf_counter()
+        sealed = self.apply_pheromones()
+        if probe is not None:
+            probe.record("pheromones", perf_counter() - start)
+            probe.count("sealed_cells", sealed)
+        # les enfants remplissent la population, leurs parents sont tirés parmi les meilleurs
+        n_children = self.pop_size - len(self.population)
+        if n_children <= 0:
+            return
+        if probe is not None:
+            start = perf_counter()
+        children = self.crossover(self.population, n_children) # mix de l'ADN des parents
+        if probe is not None:
+            middle = perf_counter()
+            probe.record("crossover", middle - start)
+        self.mutation(children) # chance pour que les enfants mutent
+        if probe is not None:
+            probe.record("mutation", perf_counter() - middle)
+        self.population.extend(children)
 
-    def crossover(self, parent1:Runner, parent2:Runner):
+    def crossover(self, parents:list, n_children:int):
         """
-        croisement de l'ADN de deux parents pour créer un enfant
+        croisement de l'ADN de parents tirés au hasard pour créer des enfants
+        (tous les croisements sont tirés d'un coup, les ADN des enfants sont écrits d'un coup dans le store)
         Args:
-            parent1 (Runner): premier parent
-            parent2 (Runner): second parent
+            parents (list): runners parmi lesquels les parents sont tirés
+            n_children (int): nombre d'enfants
         Returns:
-            Runner: l'enfant
+            list: les enfants
         """
-        # cut au hasard dans l'ADN des parents
-        dna_len = len(parent1.get_dna())
-        cut = rd.randint(1, dna_len - 1)
-        child = Runner(self.maze.get_start(), dna_len)
-        child.set_dna(parent1.get_dna()[:cut] + parent2.get_dna()[cut:])
-        return child
+        first, second = self.reproducer.pairs(len(parents), n_children)
+        lengths = np.array([runner.get_dna_length() for runner in parents], dtype=np.int64)
+        mask, child_lengths, needs1, needs2 = self.reproducer.crossover(lengths[first], lengths[second])
+        # les parents doivent avoir tiré les gènes transmis (les ADN sont prolongés à la demande)
+        needs = lengths.copy()
+        np.maximum.at(needs, first, needs1)
+        np.maximum.at(needs, second, needs2)
+        for k in np.nonzero(needs > lengths)[0].tolist():
+            parents[k].extend(int(needs[k]))
+        # la suite de l'ADN des enfants n'est tirée qu'à la demande
+        children = [Runner(self.maze.get_start(), self.runner_length, self.store) for k in range(n_children)]
+        slots = np.array([runner.get_slot() for runner in parents], dtype=np.intp)
+        width = mask.shape[1]
+        genes = np.where(mask, self.store.gather(slots[first], width), self.store.gather(slots[second], width))
+        self.store.scatter([child.get_slot() for child in children], genes, child_lengths)
+        # les premiers gènes viennent du premier parent : l'enfant reprend ses points de reprise jusque-là
+        taken = ~mask & (np.arange(width) < child_lengths[:, None])
+        prefixes = np.where(taken.any(axis=1), taken.argmax(axis=1), child_lengths)
+        for child, parent, prefix in zip(children, first.tolist(), prefixes.tolist()):
+            child.inherit(parents[parent], prefix)
+        return children
 
-    def mutation(self, runner):
+    def mutation(self, children:list):
         """
-        mutation de l'ADN d'un runner
+        mutation de l'ADN des enfants (toutes les mutations sont tirées d'un coup)
         Args:
-            runner (Runner): runner à muter
+            children (list): runners à muter
         """
-        for i in range(len(runner.get_dna())):
-            if rd.random() < self.mutation_rate:
-                runner.mutate(rd.randint(0, 7), i)
+        lengths = np.array([child.get_dna_length() for child in children], dtype=np.int64)
+        rows, positions, genes = self.reproducer.mutation(lengths, self.mutation_rate)
+        slots = np.array([child.get_slot() for child in children], dtype=np.intp)
+        self.store.put(slots[rows], positions, genes)
+        # première mutation de chaque enfant muté (les mutations sont triées par enfant puis par position)
+        mutated, first = np.unique(rows, return_index=True)
+        for k, position in zip(mutated.tolist(), positions[first].tolist()):
+            children[k].mark_changed(position)
 
     def tri_population(self):
         """
-        trie la population par fitness dans l'ordre décroissant
+        trie la population par fitness croissante (le meilleur runner en premier)
+        """
+        fitness = np.array([runner.get_fitness() for runner in self.population])
+        order = np.argsort(fitness, kind="stable")
+        self.population = [self.population[index] for index in order.tolist()]
+        self.fitness_values = fitness[order]
+
+    def mark_explored(self, cells):
+        """
+        marque des cellules comme explorées
+        Args:
+            cells (iterable): indices des cellules dans la grille aplatie avec une bordure
+        """
+        explored = self.explored
+        for cell in cells:
+            if not explored[cell]:
+                explored[cell] = 1
+                self.explored_delta.append(cell)
+
+    def merge_explored(self, explored:np.ndarray):
+        """
+        ajoute les cellules explorées par une population entière (modes "batch" et "parallel")
+        Args:
+            explored (np.ndarray): matrice (size x size), True pour les cellules visitées
         """
-        n = len(self.population)
-        for i in range(n):
-            for j in range(i):
-                if self.population[j].get_fitness() > self.population[i].get_fitness():
-                    self.population[j], self.population[i] = self.population[i], self.population[j]
+        interior = self.explored_view[1:-1, 1:-1]
+        new = explored & (interior == 0)
+        interior |= new
+        rows, cols = np.nonzero(new)
+        self.explored_delta.extend(((rows+1)*self.width + cols+1).tolist())
 
     def apply_pheromones(self):
         """
         Dépose des phéromones sur les impasses découvertes par les runners
-        """            
-        for x, y in self.explorated:
-            # Si c'est une impasse
-            if self.maze.is_dead_end(x, y):
-                self.maze.set_pheromone(x, y) # On bouche la case
+        seules les cellules découvertes depuis le dernier appel sont vérifiées, puis quand une case est bouchée
+        ses voisines explorées sont vérifiées à leur tour (on bouche toute l'impasse d'un coup)
+        Returns:
+            int: nombre de cases bouchées
+        """
+        width = self.width
+        explored = self.explored
+        grid = self.maze.grid
+        worklist = self.explored_delta
+        self.explored_delta = array("q")
+        sealed = 0
+        while worklist:
+            cell = worklist.pop()
+            x, y = cell // width - 1, cell % width - 1
+            # Si c'est une impasse (encore ouverte)
+            if grid[x, y] and self.maze.is_dead_end(x, y, self.goal):
+                self.maze.set_pheromone(x, y, self.goal) # On bouche la case
+                if not grid[x, y]:
+                    sealed += 1
+                    # ses voisines explorées sont peut-être devenues des impasses
+                    for offset in self.offsets:
+                        if explored[cell + offset]:
+                            worklist.append(cell + offset)
+        return sealed
 
-    def get_best_runner(self):
+    def get_explored(self):
         """
-        renvoie le meilleur runner de la dernière génération
+        renvoie les cellules explorées par au moins un runner
 
         Returns:
-            Runner: meilleur runner de la dernière génération
+            np.ndarray: matrice (size x size), True pour les cellules explorées
         """
-        return self.population[0]
+        return self.explored_view[1:-1, 1:-1].astype(bool)
+
+    def set_instrumentation(self, instrumentation):
+        """
+        branche (ou débranche) le chronométrage des phases de chaque génération
+        Args:
+            instrumentation (Instrumentation): instrumentation à utiliser, None pour ne plus rien mesurer
+        """
+        self.instrumentation = instrumentation
+
+    def get_instrumentation(self):
+        """
+        renvoie l'instrumentation branchée
+
+        Returns:
+            Instrumentation: instrumentation (None si aucune)
+        """
+        return self.instrumentation
+
+    @property
+    def best_fitness_history(self):
+        """
+        historique de la meilleure fitness (lu dans self.metrics, en lecture seule : enregistrer avec self.metrics.append)
+        """
+        return tuple(self.metrics.values("best_fitness"))
+
+    @property
+    def fitness_avg_history(self):
+        """
+        historique de la fitness moyenne (lu dans self.metrics, en lecture seule : enregistrer avec self.metrics.append)
+        """
+        return tuple(self.metrics.values("fitness_avg"))
+
+    @property
+    def length_history(self):
+        """
+        historique de la longueur moyenne des runners (lu dans self.metrics, en lecture seule : enregistrer avec self.metrics.append)
+        """
+        return tuple(self.metrics.values("length"))
 
     def get_fitness_history(self):
         """
         renvoie l'historique des fitness
 
         Returns:
-            list: historique des fitness
+            tuple: historique des fitness
         """
-        return self.fitness_history
+        return self.best_fitness_history
     
     def get_fitness_avg(self):
         """
         renvoie l'historique de la moyenne des fitness
 
         Returns:
-            list: historique de la moyenne des fitness
+            tuple: historique de la moyenne des fitness
         """
         return self.fitness_avg_history
     
@@ -221,17 +887,45 @@ class GeneticAlgo:
         renvoie l'historique de la longueur moyenne des runners
 
         Returns:
-            list: historique de la longueur moyenne des runners
+            tuple: historique de la longueur moyenne des runners
         """
         return self.length_history
 
+    def get_metrics(self):
+        """
+        renvoie la destination des statistiques
+
+        Returns:
+            MetricsSink: statistiques de chaque génération
+        """
+        return self.metrics
+
+    def get_store(self):
+        """
+        renvoie la matrice où sont rangés les ADN de la population
+
+        Returns:
+            GenomeStore: ADN de la population
+        """
+        return self.store
+
+    def get_best_runner(self):
+        """
+        renvoie le meilleur runner de la dernière génération évaluée
+        (avant la première évaluation, le premier runner de la population, pas encore évalué : fitness infinie)
+
+        Returns:
+            Runner: meilleur runner de la dernière génération évaluée
+        """
+        return self.best_runner if self.best_runner is not None else self.population[0]
+
     def plot_stats(self):
         """
         affiche les statistiques de l'évolution (fitness et longueur moyenne des runners)
         """
         # affiche les finess en fonction des générations
-        plt.plot(self.best_fitness_history, label='best fitness')
-        plt.plot(self.fitness_avg_history, label='average fitness')
+        plt.plot(*self.metrics.series("best_fitness"), label='best fitness')
+        plt.plot(*self.metrics.series("fitness_avg"), label='average fitness')
         plt.xlabel('generations')
         plt.ylabel('fitness')
         plt.title('fitness au fil des generations')
@@ -239,7 +933,7 @@ class GeneticAlgo:
         plt.grid(True)
         plt.show()
         # affiche la longueur moyenne des runners en fonction des générations
-        plt.plot(self.length_history, label='average runner length', color='orange')
+        plt.plot(*self.metrics.series("length"), label='average runner length', color='orange')
         plt.xlabel('generations')
         plt.ylabel('length')
         plt.title('longueur moyenne des runners au fil des generations')
@@ -0,0 +1,194 @@
+import numpy as np
+
+
+class GenomeStore:
+    """
+    Classe rangeant les ADN de plusieurs runners dans une seule matrice numpy (une ligne par runner, un octet par gène).
+    Un runner ne garde que son numéro de ligne : copier ou croiser des ADN revient à copier des tranches de lignes.
+    La matrice n'est pas réservée à la longueur maximale des ADN : elle s'élargit au fur et à mesure des gènes tirés
+    (voir Runner.extend). Une ligne est rendue quand son runner disparaît et la matrice double de nombre de lignes
+    quand toutes les lignes sont prises. Les gènes après la longueur de chaque ligne ne sont pas initialisés.
+    Pour une sauvegarde ou un envoi, les gènes (0 à 7) peuvent être compressés sur 3 bits (voir pack et unpack).
+    """
+    def __init__(self, capacity:int, length:int=0, max_length:int=None):
+        """ constructeur de GenomeStore
+        Args:
+            capacity (int): nombre de lignes réservées (la matrice grandit si besoin)
+            length (int): nombre de gènes réservés par ligne (la matrice s'élargit si besoin)
+            max_length (int): longueur maximale des ADN, la largeur ne double pas au-delà (None pour aucune limite)
+        """
+        capacity = max(1, capacity)
+        self.max_length = max_length
+        self.genes = np.empty((capacity, length), dtype=np.uint8)
+        self.lengths = np.zeros(capacity, dtype=np.int64) # nombre de gènes tirés de chaque ligne
+        self.free = list(range(capacity-1, -1, -1)) # lignes libres (la dernière de la liste est donnée en premier)
+
+    def allocate(self):
+        """
+        réserve une ligne vide
+        Returns:
+            int: numéro de la ligne
+        """
+        if not self.free:
+            self.grow()
+        slot = self.free.pop()
+        self.lengths[slot] = 0
+        return slot
+
+    def release(self, slot:int):
+        """
+        rend une ligne (ses gènes pourront être écrasés par un autre runner)
+        ses gènes ne sont plus copiés quand la matrice est réallouée (grow, widen)
+        Args:
+            slot (int): numéro de la ligne
+        """
+        self.lengths[slot] = 0
+        self.free.append(slot)
+
+    def grow(self):
+        """
+        double le nombre de lignes de la matrice
+        """
+        capacity = len(self.genes)
+        self.reallocate(2*capacity, self.genes.shape[1])
+        self.free.extend(range(2*capacity-1, capacity-1, -1))
+
+    def widen(self, length:int):
+        """
+        élargit la matrice pour que chaque ligne puisse contenir length gènes
+        (la largeur double au moins, sans dépasser max_length, pour que les ADN tirés bloc par bloc
+        ne réallouent pas la matrice à chaque bloc)
+        Args:
+            length (int): nombre de gènes voulu par ligne
+        """
+        width = self.genes.shape[1]
+        if length <= width:
+            return
+        doubled = 2 * width if self.max_length is None else min(2 * width, self.max_length)
+        self.reallocate(len(self.genes), max(length, doubled))
+
+    def reallocate(self, capacity:int, width:int):
+        """
+        remplace la matrice par une nouvelle matrice non initialisée, où seuls les gènes tirés des lignes occupées
+        sont recopiés (les pages des lignes libres et des colonnes pas encore tirées ne sont pas touchées)
+        Args:
+            capacity (int): nouveau nombre de lignes
+            width (int): nouveau nombre de gènes par ligne
+        """
+        genes = np.empty((capacity, width), dtype=np.uint8)
+        lengths = np.zeros(capacity, dtype=np.int64)
+        used = np.nonzero(self.lengths)[0] # les lignes libres ont une longueur nulle
+        if len(used):
+            used_width = int(self.lengths[used].max())
+            genes[used, :used_width] = self.genes[used, :used_width]
+            lengths[used] = self.lengths[used]
+        self.genes = genes
+        self.lengths = lengths
+
+    def row(self, slot:int):
+        """
+        renvoie les gènes tirés d'une ligne (vue sur la matrice, sans copie)
+        Args:
+            slot (int): numéro de la ligne
+        Returns:
+            np.ndarray: gènes de la ligne
+        """
+        return self.genes[slot, :self.lengths[slot]]
+
+    def gather(self, slots:list, length:int):
+        """
+        copie plusieurs lignes dans une nouvelle matrice (pour simuler toute une population d'un coup)
+        Args:
+            slots (list): numéros des lignes, dans l'ordre voulu
+            length (int): nombre de gènes copiés par ligne
+        Returns:
+            np.ndarray: matrice (len(slots) x length) des gènes
+        """
+        return self.genes[np.asarray(slots, dtype=np.intp), :length]
+
+    def scatter(self, slots:list, genes:np.ndarray, lengths:np.ndarray):
+        """
+        écrit plusieurs lignes d'un coup (les gènes après la longueur de chaque ligne sont ignorés)
+        Args:
+            slots (list): numéros des lignes
+            genes (np.ndarray): matrice (len(slots) x n) des gènes
+            lengths (np.ndarray): nombre de gènes de chaque ligne
+        """
+        self.widen(genes.shape[1])
+        slots = np.asarray(slots, dtype=np.intp)
+        self.genes[slots, :genes.shape[1]] = genes
+        self.lengths[slots] = lengths
+
+    def put(self, slots:np.ndarray, positions:np.ndarray, genes:np.ndarray):
+        """
+        écrit des gènes isolés (mutations de plusieurs lignes d'un coup)
+        Args:
+            slots (np.ndarray): numéro de la ligne de chaque gène
+            positions (np.ndarray): position de chaque gène dans sa ligne
+            genes (np.ndarray): nouveaux gènes
+        """
+        self.genes[slots, positions] = genes
+
+    def get_length(self, slot:int):
+        """
+        renvoie le nombre de gènes tirés d'une ligne
+
+        Args:
+            slot (int): numéro de la ligne
+        Returns:
+            int: nombre de gènes
+        """
+        return int(self.lengths[slot])
+
+    def set_length(self, slot:int, length:int):
+        """
+        définit le nombre de gènes tirés d'une ligne (les gènes suivants sont ignorés)
+        Args:
+            slot (int): numéro de la ligne
+            length (int): nombre de gènes
+        """
+        self.lengths[slot] = length
+
+    def get_genes(self):
+        """
+        renvoie la matrice des gènes (toutes les lignes, y compris les lignes libres)
+
+        Returns:
+            np.ndarray: matrice (capacité x largeur) des gènes, non initialisée après la longueur de chaque ligne
+        """
+        return self.genes
+
+    def __len__(self):
+        """
+        renvoie le nombre de lignes occupées
+
+        Returns:
+            int: nombre de lignes occupées
+        """
+        return len(self.genes) - len(self.free)
+
+    @staticmethod
+    def pack(genes:np.ndarray):
+        """
+        compresse une matrice de gènes sur 3 bits par gène (8 gènes dans 3 octets)
+        Args:
+            genes (np.ndarray): matrice (n x length) de gènes entre 0 et 7
+        Returns:
+            np.ndarray: matrice (n x ceil(3*length/8)) d'octets
+        """
+        genes = np.asarray(genes, dtype=np.uint8)
+        bits = np.unpackbits(genes[:, :, None], axis=2)[:, :, 5:] # les 3 bits de poids faible de chaque gène
+        return np.packbits(bits.reshape(len(genes), -1), axis=1)
+
+    @staticmethod
+    def unpack(packed:np.ndarray, length:int):
+        """
+        décompresse une matrice compressée par pack
+        Args:
+            packed (np.ndarray): matrice d'octets renvoyée par pack
+            length (int): nombre de gènes par ligne
+        Returns:
+            np.ndarray: matrice (n x length) des gènes
+        """
+        bits = np.unpackbits(packed, axis=1, count=3*length).reshape(len(packed), length, 3)
+        return (bits[:, :, 0] << 2) | (bits[:, :, 1] << 1) | bits[:, :, 2]
@@ -0,0 +1,146 @@
+import cProfile
+import csv
+import json
+import pstats
+from time import perf_counter
+
+
+# phases chronométrées par GeneticAlgo (dans l'ordre d'une génération)
+PHASES = ("journey", "fitness", "evaluation", "sorting", "selection", "pheromones", "crossover", "mutation")
+
+class Instrumentation:
+    """
+    Classe enregistrant, pour chaque génération, le temps passé dans chaque phase de l'algorithme génétique
+    et des compteurs (coups dans les murs, cases bouchées, ...).
+    Elle est branchée sur GeneticAlgo avec set_instrumentation, sans elle GeneticAlgo ne chronomètre rien.
+    Les observateurs (fonctions) reçoivent l'enregistrement de chaque génération dès qu'elle est terminée.
+    """
+    def __init__(self, profile_window:tuple=None, profile_path:str=None):
+        """ constructeur de Instrumentation
+        Args:
+            profile_window (tuple (int, int)): générations [début, fin[ profilées avec cProfile (None pour ne pas profiler)
+            profile_path (str): fichier où écrire les statistiques cProfile à la fin de la fenêtre (None pour les garder en mémoire)
+        """
+        self.records = [] # un dict par génération terminée
+        self.observers = []
+        self.current = None # enregistrement de la génération en cours
+        self.generation = -1
+        self.profile_window = profile_window
+        self.profile_path = profile_path
+        self.profiler = None
+        self.profile_stats = None
+
+    def add_observer(self, observer):
+        """
+        ajoute un observateur
+        Args:
+            observer (function): appelée avec l'enregistrement (dict) de chaque génération terminée
+        """
+        self.observers.append(observer)
+
+    def start_generation(self):
+        """
+        commence l'enregistrement d'une nouvelle génération (et termine la précédente si besoin)
+        """
+        self.end_generation()
+        self.generation += 1
+        self.current = {"generation": self.generation}
+        for phase in PHASES:
+            self.current["time_" + phase] = 0.0
+        self.current["start"] = perf_counter()
+        if self.profile_window is not None and self.generation == self.profile_window[0]:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        elif self.profiler is not None:
+            self.profiler.enable() # reprise du profilage mis en pause entre deux générations
+
+    def end_generation(self):
+        """
+        termine l'enregistrement de la génération en cours et le transmet aux observateurs
+        (ne fait rien si aucune génération n'est en cours)
+        le profilage est mis en pause jusqu'à la génération suivante : le temps passé hors des générations n'est pas compté
+        """
+        if self.current is None:
+            return
+        record = self.current
+        self.current = None
+        record["time_total"] = perf_counter() - record.pop("start")
+        self.records.append(record)
+        if self.profiler is not None:
+            if self.generation >= self.profile_window[1] - 1:
+                self.stop_profile()
+            else:
+                self.profiler.disable()
+        for observer in self.observers:
+            observer(record)
+
+    def record(self, phase:str, seconds:float):
+        """
+        ajoute du temps à une phase de la génération en cours
+        Args:
+            phase (str): nom de la phase
+            seconds (float): durée (en secondes)
+        """
+        if self.current is not None:
+            self.current["time_" + phase] = self.current.get("time_" + phase, 0.0) + seconds
+
+    def count(self, counter:str, value:int):
+        """
+        ajoute une valeur à un compteur de la génération en cours
+        Args:
+            counter (str): nom du compteur
+            value (int): valeur ajoutée
+        """
+        if self.current is not None:
+            self.current[counter] = self.current.get(counter, 0) + value
+
+    def stop_profile(self):
+        """
+        arrête le profilage cProfile et écrit (ou garde) ses statistiques
+        """
+        self.profiler.disable()
+        if self.profile_path is not None:
+            self.profiler.dump_stats(self.profile_path)
+        self.profile_stats = pstats.Stats(self.profiler)
+        self.profiler = None
+
+    def get_records(self):
+        """
+        renvoie les enregistrements des générations terminées
+
+        Returns:
+            list: un dict par génération (generation, time_<phase>, time_total et compteurs)
+        """
+        return self.records
+
+    def get_profile_stats(self):
+        """
+        renvoie les statistiques cProfile de la fenêtre profilée
+
+        Returns:
+            pstats.Stats: statistiques (None si la fenêtre n'a pas encore été profilée)
+        """
+        return self.profile_stats
+
+    def to_csv(self, path:str):
+        """
+        écrit les enregistrements dans un fichier CSV (une ligne par génération)
+        Args:
+            path (str): chemin du fichier
+        """
+        fields = []
+        for record in self.records:
+            fields += [field for field in record if field not in fields]
+        with open(path, "w", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=fields, restval=0)
+            writer.writeheader()
+            writer.writerows(self.records)
+
+    def to_json(self, path:str):
+        """
+        écrit les enregistrements dans un fichier JSON
+        Args:
+            path (str): chemin du fichier
+        """
+        with open(path, "w") as file:
+            json.dump(self.records, file, indent=2)
@@ -0,0 +1,139 @@
+import multiprocessing as mp
+import queue
+import random as rd
+import numpy as np
+from GeneticAlgo import GeneticAlgo
+from Runner import Runner
+
+
+# délai (en secondes) entre deux vérifications de l'état des îles pendant l'attente des résultats
+POLL_INTERVAL = 1.0
+
+def run_island(index:int, maze, ga_params:dict, max_generations:int, migration_interval:int, n_migrants:int, inbox, outbox, results, seed:int):
+    """
+    fait évoluer une île (exécuté dans son propre processus)
+    toutes les migration_interval générations, l'île envoie l'ADN de ses meilleurs runners à l'île suivante
+    et remplace ses derniers enfants par les migrants reçus de l'île précédente
+    Args:
+        index (int): numéro de l'île
+        maze (Maze): labyrinthe (copié une seule fois au lancement du processus)
+        ga_params (dict): paramètres de GeneticAlgo (hors maze et max_generations)
+        max_generations (int): nombre de générations
+        migration_interval (int): nombre de générations entre deux migrations
+        n_migrants (int): nombre de runners envoyés à chaque migration (au plus le nombre d'enfants de chaque génération)
+        inbox (multiprocessing.Queue): migrants reçus de l'île précédente
+        outbox (multiprocessing.Queue): migrants envoyés à l'île suivante
+        results (multiprocessing.Queue): résultat de l'île à la fin de l'évolution
+        seed (int): graine aléatoire de l'île
+    """
+    rd.seed(seed)
+    np.random.seed(seed % 2**32)
+    ga = GeneticAlgo(maze, max_generations=max_generations, **ga_params)
+    # les migrants ne remplacent que des enfants, jamais des survivants
+    n_migrants = min(n_migrants, ga.pop_size - round(ga.pop_size*ga.selection_rate))
+    best_runner = None
+    for generation in range(max_generations):
+        best_runner = ga.run_generation()
+        if generation == max_generations - 1:
+            break
+        ga.selection()
+        ga.reproduction()
+        if (generation+1) % migration_interval == 0:
+            # la population est encore triée : les premiers sont les meilleurs survivants
+            outbox.put([runner.get_dna() for runner in ga.population[:n_migrants]])
+            for k, dna in enumerate(inbox.get()):
+                migrant = Runner(maze.get_start(), ga.runner_length, ga.get_store()) # l'ADN reçu a pu être raccourci au but
+                migrant.set_dna(dna)
+                ga.population[-1-k] = migrant # les migrants remplacent les derniers enfants
+    ga.close()
+    results.put({
+        "island": index,
+        "dna": best_runner.get_dna(),
+        "path": list(best_runner.get_path()),
+        "fitness": best_runner.get_fitness(),
+        "last_cell": best_runner.get_last_cell(),
+        "reached_goal": best_runner.is_goal_reached(),
+        "best_fitness_history": ga.best_fitness_history,
+        "fitness_avg_history": ga.fitness_avg_history,
+        "length_history": ga.length_history,
+    })
+
+
+class IslandModel:
+    """
+    Classe représentant un algorithme génétique à plusieurs populations (îles).
+    Chaque île évolue indépendamment dans son propre processus sur le même labyrinthe,
+    et toutes les migration_interval générations les îles s'échangent l'ADN de leurs meilleurs runners (en anneau).
+    """
+    def __init__(self, maze, n_islands:int, migration_interval:int, n_migrants:int, max_generations:int, seed:int=None, **ga_params):
+        """ constructeur de IslandModel
+        Args:
+            maze (Maze): labyrinthe utilisé
+            n_islands (int): nombre d'îles (une par processus)
+            migration_interval (int): nombre de générations entre deux migrations
+            n_migrants (int): nombre de runners envoyés à chaque migration
+            max_generations (int): nombre de générations de chaque île
+            seed (int): graine aléatoire (l'île k utilise seed + k), None pour des graines aléatoires
+            **ga_params: paramètres de GeneticAlgo pour chaque île (runner_length, pop_size, mutation_rate, selection_rate, ...)
+        """
+        self.maze = maze
+        self.n_islands = n_islands
+        self.migration_interval = migration_interval
+        self.n_migrants = n_migrants
+        self.max_generations = max_generations
+        self.seed = seed if seed is not None else rd.randrange(2**32)
+        self.ga_params = ga_params
+        self.histories = [] # historiques de chaque île (remplis par evolution)
+
+    def evolution(self):
+        """
+        fait évoluer toutes les îles en parallèle
+        Returns:
+            Runner: le meilleur runner toutes îles confondues
+        """
+        # l'île k reçoit ses migrants dans queues[k] et envoie les siens dans queues[k+1]
+        queues = [mp.Queue() for k in range(self.n_islands)]
+        results = mp.Queue()
+        islands = []
+        for k in range(self.n_islands):
+            island = mp.Process(target=run_island, args=(k, self.maze, self.ga_params, self.max_generations, self.migration_interval,
+                                                        self.n_migrants, queues[k], queues[(k+1) % self.n_islands], results, self.seed + k))
+            island.start()
+            islands.append(island)
+        reports = []
+        while len(reports) < self.n_islands:
+            try:
+                reports.append(results.get(timeout=POLL_INTERVAL))
+            except queue.Empty:
+                # une île arrêtée par une erreur ne renverra jamais son résultat (et ses voisines attendent ses migrants)
+                crashed = [k for k, island in enumerate(islands) if not island.is_alive() and island.exitcode != 0]
+                if crashed:
+                    for island in islands:
+                        island.terminate()
+                        island.join()
+                    raise RuntimeError(f"île {crashed[0]} arrêtée (code de sortie {islands[crashed[0]].exitcode})")
+        reports.sort(key=lambda report: report["island"])
+        for island in islands:
+            island.join()
+        self.histories = [{
+            "best_fitness_history": report["best_fitness_history"],
+            "fitness_avg_history": report["fitness_avg_history"],
+            "length_history": report["length_history"],
+        } for report in reports]
+        best = min(reports, key=lambda report: report["fitness"])
+        best_runner = Runner(self.maze.get_start(), 0, gene_seed=0) # ADN complet, rien n'est tiré à la demande
+        best_runner.set_dna(best["dna"])
+        best_runner.set_path(best["path"])
+        best_runner.set_fitness(best["fitness"])
+        best_runner.set_last_cell(best["last_cell"])
+        best_runner.set_reached_goal(best["reached_goal"])
+        return best_runner
+
+    def get_histories(self):
+        """
+        renvoie les historiques de chaque île
+
+        Returns:
+            list: pour chaque île, un dict avec best_fitness_history, fitness_avg_history et length_history
+        """
+        return self.histories
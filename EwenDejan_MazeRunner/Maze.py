@@ -1,5 +1,10 @@
+import json
 import math
-import sys
+import os
+import struct
+import tempfile
+from collections import OrderedDict
+from heapq import heappop, heappush
 import numpy as np
 import random as rd
 import matplotlib.pyplot as plt
@@ -7,23 +12,95 @@ from PIL import Image
 from Pile import Pile
 
 
+# couleurs de l'affichage
+WALL_COLOR = [0, 0, 0]
+PATH_COLOR = [255, 255, 255]
+PHEROMONE_COLOR = [100, 100, 100]
+
+# nom de l'algorithme de génération (change si la génération ne donne plus le même labyrinthe pour une graine)
+GENERATOR = "tp-8-voisins-v1"
+
+# format binaire d'un labyrinthe : en-tête puis grilles et distances alignées sur ALIGNMENT octets
+MAGIC = b"MAZE"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sIqqqqqq8sBB") # magic, version, taille, graine, départ, arrivée, type des distances, drapeaux
+ALIGNMENT = 64
+
+# taille maximale par défaut du cache des matrices de distances (en octets)
+FIELD_CACHE_BYTES = 256 * 2**20
+
+# méthodes de recherche de chemin disponibles pour shortest_path
+PATH_METHODS = ("astar", "bidirectional", "field")
+# marques des cellules atteintes par les recherches de chemin (les 3 bits de poids faible gardent la direction)
+REACHED = 16
+GOAL_SIDE = 8
+
+# nombre de lignes traitées à la fois pour les opérations sur toute la grille (bandes de lignes)
+TILE_ROWS = 1024
+
+def distance_dtype(n:int):
+    """
+    renvoie le plus petit type entier signé capable de stocker les distances d'un labyrinthe n x n
+    (de -1 pour les murs à n*n pour les cellules inaccessibles)
+    Args:
+        n (int): taille du labyrinthe
+    Returns:
+        np.dtype: type des distances
+    """
+    for dtype in (np.int16, np.int32):
+        if n*n <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
 class Maze:
     """
     Classe représentant un labyrinthe carré de taille n x n.
+    La topologie est stockée dans une grille de booléens (True = chemin),
+    l'image RGB n'est construite qu'à la demande pour l'affichage.
     """
-    def __init__(self, n:int):
+    def __init__(self, n:int, storage:str=None, seed:int=None):
         """ constructeur de Maze
         initialise un labyrinthe et définit un start aléatoire
 
         Args:
             n (int): taille du labyrinthe (n x n)
+            storage (str): dossier où projeter la grille et les distances (np.memmap),
+                None pour tout garder en mémoire
+            seed (int): graine du labyrinthe (départ, génération, arrivée),
+                None pour utiliser le générateur aléatoire global
+        """
+        self.setup(n, storage, "w+")
+        self.seed = seed
+        self.rng = rd if seed is None else rd.Random(seed)
+        # start aléatoire
+        rand_x = self.rng.randint(0, self.size-1)
+        rand_y = self.rng.randint(0, self.size-1)
+        while self.map[rand_x][rand_y] == -1:
+            rand_x = self.rng.randint(0, self.size-1)
+            rand_y = self.rng.randint(0, self.size-1)
+        self.start = (rand_x, rand_y)
+        self.change_color(rand_x, rand_y, [255,0,0])
+        self.goal = (0, 0)
+
+    def setup(self, n:int, storage:str, mode:str):
+        """
+        crée (ou rouvre) la grille et la matrice des distances
+        Args:
+            n (int): taille du labyrinthe (n x n)
+            storage (str): dossier des fichiers projetés, None pour tout garder en mémoire
+            mode (str): mode d'ouverture des fichiers projetés ("w+" pour les créer, "r", "r+" ou "c" pour les rouvrir)
         """
-        sys.setrecursionlimit(n*n*n)
         self.size = n
+        self.storage = storage
+        self.mode = mode
         self.pile = Pile()
-        self.maze = np.zeros((n, n, 3), dtype=np.uint8) # matrice représentant le labyrinthe (au depart que des murs)
-        self.empty_maze = None
-        self.map = np.full((self.size, self.size), self.size**2, dtype=np.int64) # matrice des distances Dijkstra
+        self.colors = {} # couleurs posées par change_color, uniquement pour l'affichage
+        self.map_goal = None # arrivée pour laquelle self.map a été calculée
+        # cache des matrices de distances pour d'autres arrivées (clé : ensemble des arrivées)
+        self.fields = OrderedDict()
+        self.fields_bytes = 0
+        self.field_cache_bytes = FIELD_CACHE_BYTES
         self.cardinal = {
             0: [0, 1],
             1: [-1, 1],
@@ -34,28 +111,209 @@ class Maze:
             6: [1, 0],
             7: [1, 1],
         }
-        # start aléatoire
-        rand_x = rd.randint(0, self.size-1)
-        rand_y = rd.randint(0, self.size-1)
-        while self.map[rand_x][rand_y] == -1:
-            rand_x = rd.randint(0, self.size-1)
-            rand_y = rd.randint(0, self.size-1)
-        self.start = (rand_x, rand_y)
-        self.change_color(rand_x, rand_y, [255,0,0])
-        self.goal = (0, 0)
+        self.directions = {tuple(move): direction for direction, move in self.cardinal.items()}
+        if storage is not None:
+            os.makedirs(storage, exist_ok=True)
+        # cellules ouvertes du labyrinthe (au depart que des murs)
+        self.grid = self.buffer("grid.bin", (n, n), bool, mode)
+        # matrice des distances Dijkstra
+        self.map = self.buffer("map.bin", (n, n), distance_dtype(n), mode)
+        if mode == "w+":
+            for row in range(0, n, TILE_ROWS):
+                self.map[row:row+TILE_ROWS] = n*n
+        # grille juste après la génération (avant les phéromones)
+        self.empty_grid = None
+        if mode != "w+" and os.path.exists(os.path.join(storage, "empty_grid.bin")):
+            self.empty_grid = self.buffer("empty_grid.bin", (n, n), bool, mode)
+        # index des mouvements légaux : le bit d d'une cellule vaut 1 si on peut aller dans la direction d
+        # (voisine dans le labyrinthe et qui n'est pas un mur, même règle que is_valid)
+        if mode != "w+" and os.path.exists(os.path.join(storage, "moves.bin")):
+            self.moves = self.buffer("moves.bin", (n, n), np.uint8, mode)
+        else:
+            self.moves = self.buffer("moves.bin", (n, n), np.uint8) if mode == "w+" else np.zeros((n, n), dtype=np.uint8)
+            self.update_moves()
+
+    def buffer(self, name:str, shape:tuple, dtype, mode:str="w+"):
+        """
+        renvoie un tableau, en mémoire ou projeté dans un fichier du dossier storage
+        (un tableau créé est rempli de zéros)
+        Args:
+            name (str): nom du fichier dans le dossier storage
+            shape (tuple): dimensions du tableau
+            dtype: type des éléments
+            mode (str): mode d'ouverture du fichier ("w+" pour le créer)
+        Returns:
+            np.ndarray: le tableau (np.memmap si le labyrinthe a un dossier storage)
+        """
+        if self.storage is None:
+            return np.zeros(shape, dtype=dtype)
+        return np.memmap(os.path.join(self.storage, name), dtype=dtype, mode=mode, shape=shape)
+
+    def scratch(self, shape:tuple, dtype):
+        """
+        renvoie un tableau de travail rempli de zéros, en mémoire ou projeté dans un fichier temporaire du dossier storage
+        le fichier a un nom unique et est supprimé dès sa création : plusieurs processus peuvent travailler
+        sur le même dossier, et la place est rendue quand le tableau est supprimé (del)
+        Args:
+            shape (tuple): dimensions du tableau
+            dtype: type des éléments
+        Returns:
+            np.ndarray: le tableau (np.memmap si le labyrinthe a un dossier storage)
+        """
+        if self.storage is None:
+            return np.zeros(shape, dtype=dtype)
+        with tempfile.TemporaryFile(dir=self.storage) as file:
+            return np.memmap(file, dtype=dtype, mode="w+", shape=shape)
+
+    def owns_storage(self):
+        """
+        renvoie True si le labyrinthe écrit dans son dossier storage (créé avec "w+" ou rouvert avec "r+")
+
+        Returns:
+            bool: True si les fichiers du dossier storage sont modifiés par ce labyrinthe
+        """
+        return self.storage is not None and self.mode in ("w+", "r+")
+
+    def flush(self):
+        """
+        écrit sur le disque la grille, les distances et les informations du labyrinthe (taille, départ, arrivée)
+        (ne fait rien si le labyrinthe est en mémoire ou rouvert sans écriture ("c" ou "r"),
+        les fichiers partagés avec d'autres processus ne sont alors jamais modifiés)
+        """
+        if not self.owns_storage():
+            return
+        for array in (self.grid, self.map, self.empty_grid, self.moves):
+            if isinstance(array, np.memmap):
+                array.flush()
+        with open(os.path.join(self.storage, "maze.json"), "w") as file:
+            json.dump({"size": self.size, "seed": self.seed, "start": [int(v) for v in self.start], "goal": [int(v) for v in self.goal],
+                       "map_goal": None if self.map_goal is None else [int(v) for v in self.map_goal]}, file)
+
+    @classmethod
+    def open(cls, storage:str, mode:str="c"):
+        """
+        rouvre un labyrinthe enregistré dans un dossier (par flush), sans rien charger en mémoire
+        plusieurs processus peuvent ouvrir le même labyrinthe et partager les pages via le cache du système
+        Args:
+            storage (str): dossier du labyrinthe
+            mode (str): "c" (copie à l'écriture, les phéromones restent propres au processus),
+                "r" (lecture seule) ou "r+" (les modifications sont écrites dans les fichiers)
+        Returns:
+            Maze: le labyrinthe
+        """
+        with open(os.path.join(storage, "maze.json")) as file:
+            info = json.load(file)
+        maze = cls.__new__(cls)
+        maze.setup(info["size"], storage, mode)
+        maze.seed = info.get("seed")
+        maze.rng = rd if maze.seed is None else rd.Random(maze.seed)
+        maze.start = tuple(info["start"])
+        maze.goal = tuple(info["goal"])
+        if info.get("map_goal") is not None:
+            maze.map_goal = tuple(info["map_goal"])
+        return maze
     
+    def save(self, path:str, with_map:bool=True):
+        """
+        enregistre le labyrinthe dans un fichier binaire compact
+        (en-tête, grille, grille avant phéromones et éventuellement les distances Dijkstra)
+        Args:
+            path (str): chemin du fichier
+            with_map (bool): True pour enregistrer aussi les distances Dijkstra
+        """
+        n = self.size
+        has_empty_grid = self.empty_grid is not None
+        header = HEADER.pack(MAGIC, FORMAT_VERSION, n, -1 if self.seed is None else self.seed,
+                             self.start[0], self.start[1], self.goal[0], self.goal[1],
+                             self.map.dtype.str.encode(), int(with_map), int(has_empty_grid))
+        # fichier temporaire au nom unique : deux processus qui enregistrent le même labyrinthe ne se gênent pas
+        with tempfile.NamedTemporaryFile("wb", dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp", delete=False) as file:
+            try:
+                file.write(header)
+                for offset, array in zip(Maze.layout(n, self.map.dtype, has_empty_grid, with_map),
+                                         (self.grid, self.empty_grid, self.map)):
+                    if offset is None:
+                        continue
+                    file.write(bytes(offset - file.tell())) # alignement
+                    for row in range(0, n, TILE_ROWS):
+                        file.write(np.ascontiguousarray(array[row:row+TILE_ROWS]).tobytes())
+            except BaseException:
+                file.close()
+                os.remove(file.name)
+                raise
+        os.replace(file.name, path) # le fichier n'apparaît qu'une fois complet
+
+    @classmethod
+    def load(cls, path:str, mode:str="c"):
+        """
+        charge un labyrinthe enregistré par save, sans copie : les grilles sont projetées depuis le fichier
+        Args:
+            path (str): chemin du fichier
+            mode (str): "c" (copie à l'écriture), "r" (lecture seule) ou "r+" (les modifications sont écrites dans le fichier)
+        Returns:
+            Maze: le labyrinthe (les distances valent size**2 si elles n'ont pas été enregistrées)
+        """
+        with open(path, "rb") as file:
+            fields = HEADER.unpack(file.read(HEADER.size))
+        magic, version, n, seed, start_x, start_y, goal_x, goal_y, dtype, with_map, has_empty_grid = fields
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path} n'est pas un labyrinthe enregistré (ou sa version n'est pas supportée)")
+        dtype = np.dtype(dtype.rstrip(b"\0").decode())
+        maze = cls.__new__(cls)
+        maze.setup(0, None, "w+")
+        maze.size = n
+        maze.seed = None if seed == -1 else seed
+        maze.rng = rd if maze.seed is None else rd.Random(maze.seed)
+        maze.start = (start_x, start_y)
+        maze.goal = (goal_x, goal_y)
+        grid_offset, empty_offset, map_offset = Maze.layout(n, dtype, has_empty_grid, with_map)
+        maze.grid = np.memmap(path, dtype=bool, mode=mode, offset=grid_offset, shape=(n, n))
+        if has_empty_grid:
+            maze.empty_grid = np.memmap(path, dtype=bool, mode=mode, offset=empty_offset, shape=(n, n))
+        if with_map:
+            maze.map = np.memmap(path, dtype=dtype, mode=mode, offset=map_offset, shape=(n, n))
+            maze.map_goal = maze.goal
+        else:
+            maze.map = np.full((n, n), n*n, dtype=dtype)
+        maze.moves = np.zeros((n, n), dtype=np.uint8)
+        maze.update_moves()
+        return maze
+
+    @staticmethod
+    def layout(n:int, dtype, has_empty_grid:bool, with_map:bool):
+        """
+        calcule la position dans le fichier de la grille, de la grille avant phéromones et des distances
+        Args:
+            n (int): taille du labyrinthe
+            dtype: type des distances
+            has_empty_grid (bool): True si la grille avant phéromones est enregistrée
+            with_map (bool): True si les distances sont enregistrées
+        Returns:
+            tuple: position de chaque tableau (None s'il n'est pas enregistré)
+        """
+        def align(offset):
+            return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+        grid_offset = align(HEADER.size)
+        offset = grid_offset + n*n
+        empty_offset = None
+        if has_empty_grid:
+            empty_offset = align(offset)
+            offset = empty_offset + n*n
+        map_offset = align(offset) if with_map else None
+        return grid_offset, empty_offset, map_offset
+
     def solve_from_random_coordonnates(self):
         """
         créer une arrivée aléatoire
         et résout le labyrinthe en utilsant dijkstra
         """
         # arrivée aléatoire
-        rand_x = rd.randint(0, self.size-1)
-        rand_y = rd.randint(0, self.size-1)
+        rand_x = self.rng.randint(0, self.size-1)
+        rand_y = self.rng.randint(0, self.size-1)
         dist_from_start = math.sqrt((rand_x - self.start[0])**2 + (rand_y - self.start[1])**2) # on s'assure que l'arrivée n'est pas trop proche du départ
-        while self.map[rand_x][rand_y] == -1 and dist_from_start < self.size*2/3:
-            rand_x = rd.randint(0, self.size-1)
-            rand_y = rd.randint(0, self.size-1)
+        while not self.grid[rand_x][rand_y] and dist_from_start < self.size*2/3:
+            rand_x = self.rng.randint(0, self.size-1)
+            rand_y = self.rng.randint(0, self.size-1)
         self.goal = (rand_x, rand_y)
         self.change_color(rand_x, rand_y, [255,0,0])
         self.dijkstra()
@@ -63,161 +321,492 @@ class Maze:
         self.change_color(self.start[0], self.start[1], [0,255,0]) # départ en vert (pour l'affichage dijkstra)
         self.change_color(self.goal[0], self.goal[1], [0,255,0]) # arrivée en vert (pour l'affichage dijkstra)
 
-    def solve(self, x:int, y:int):
+    def solve(self, x:int, y:int, goal:tuple=None):
         """
         résout le labyrinthe en suivant les distances Dijkstra
         (en coloriant le chemin en rouge)
         Args:
             x (int): coordonnées en x
             y (int): coordonnées en y
+            goal (tuple (int, int)): arrivée visée (None pour l'arrivée du labyrinthe)
         """
-        min_i, min_j = x, y
-        self.change_color(x, y, [255,0,0])
-        for direction in self.cardinal:
-            i = x+self.cardinal[direction][0]
-            j = y+self.cardinal[direction][1]
-            # tant qu'on est dans le labyrinthe
-            if (i>=0 and i<self.size) and (j>=0 and j<self.size):
-                # on cherche la cellule voisine avec la plus petite distance de l'arrivée
-                if 0 <= self.map[i][j] < self.map[min_i][min_j]:
-                    min_i = i
-                    min_j = j
-        # on continue la résolution tant qu'on n'est pas arrivé
-        if (x!=self.goal[0] or y!=self.goal[1]) and (x!=min_i or y!=min_j):
-            self.solve(min_i, min_j)
+        goal = self.goal if goal is None else goal
+        # self.map contient les distances de l'arrivée du labyrinthe (éventuellement posées à la main)
+        distances = self.map if goal in (self.goal, self.map_goal) else self.distance_field(goal)
+        for i, j in self.descend(distances, (x, y), goal):
+            self.change_color(i, j, [255,0,0])
+
+    def descend(self, distances:np.ndarray, cell:tuple, goal:tuple):
+        """
+        suit les distances Dijkstra en allant toujours vers le voisin le plus proche de l'arrivée
+        (sans récursion ni modification de l'image)
+        Args:
+            distances (np.ndarray): matrice des distances de l'arrivée
+            cell (tuple (int, int)): cellule de départ
+            goal (tuple (int, int)): arrivée
+        Returns:
+            list: cellules parcourues, de cell jusqu'à l'arrivée (ou jusqu'à la cellule où on est bloqué)
+        """
+        x, y = cell
+        cells = [(x, y)]
+        while (x, y) != goal:
+            min_i, min_j = x, y
+            legal = int(self.moves[x, y])
+            for direction in self.cardinal:
+                # seulement les voisines dans le labyrinthe et ouvertes
+                if legal >> direction & 1:
+                    i = x+self.cardinal[direction][0]
+                    j = y+self.cardinal[direction][1]
+                    # on cherche la cellule voisine avec la plus petite distance de l'arrivée
+                    if 0 <= distances[i, j] < distances[min_i, min_j]:
+                        min_i = i
+                        min_j = j
+            if (x, y) == (min_i, min_j):
+                break # bloqué
+            x, y = min_i, min_j
+            cells.append((x, y))
+        return cells
+
+    def shortest_path(self, start:tuple, goal:tuple, method:str="astar"):
+        """
+        renvoie un plus court chemin entre deux cellules, sans modifier l'image du labyrinthe
+        Args:
+            start (tuple (int, int)): cellule de départ
+            goal (tuple (int, int)): cellule d'arrivée
+            method (str): "astar" (A* guidé par la distance de Tchebychev, n'explore que les cellules utiles),
+                "bidirectional" (parcours en largeur depuis les deux extrémités à la fois)
+                ou "field" (descente des distances Dijkstra de goal, calculées une fois puis gardées en cache)
+        Returns:
+            np.ndarray: matrice (k x 2) des cellules du chemin, de start à goal (vide si goal est inaccessible)
+        """
+        if method not in PATH_METHODS:
+            raise ValueError(f"méthode de recherche inconnue : {method}")
+        start = (int(start[0]), int(start[1]))
+        goal = (int(goal[0]), int(goal[1]))
+        if not self.grid[start] or not self.grid[goal]:
+            return np.empty((0, 2), dtype=np.int64)
+        if method == "field":
+            distances = self.map if goal == self.map_goal else self.distance_field(goal)
+            cells = self.descend(distances, start, goal)
+            if cells[-1] != goal:
+                cells = []
+        else:
+            n = self.size
+            width = n + 2
+            # grille aplatie avec une bordure de murs : 1 pour un mur, 0 pour une cellule libre
+            # (les cellules atteintes gardent la direction par laquelle on y est arrivé)
+            marks = self.scratch((width, width), np.uint8)
+            self.pad(marks, ~self.grid, 1)
+            offsets = [move[0]*width + move[1] for move in self.cardinal.values()]
+            cells = memoryview(marks.reshape(-1))
+            origin = (start[0]+1)*width + start[1]+1
+            target = (goal[0]+1)*width + goal[1]+1
+            if method == "astar":
+                flat = self.astar(cells, offsets, width, origin, target)
+            else:
+                flat = self.bidirectional_search(cells, offsets, origin, target)
+            cells.release()
+            del marks
+            cells = [(cell // width - 1, cell % width - 1) for cell in flat]
+        return np.array(cells, dtype=np.int64).reshape(-1, 2)
+
+    def astar(self, cells:memoryview, offsets:list, width:int, start:int, goal:int):
+        """
+        recherche A* entre deux cellules (tous les déplacements coûtent 1, diagonales comprises,
+        donc la distance de Tchebychev ne surestime jamais la distance restante)
+        Args:
+            cells (memoryview): grille aplatie avec une bordure de murs (1 pour un mur, 0 sinon)
+            offsets (list): déplacement dans la grille aplatie pour chaque direction
+            width (int): largeur de la grille aplatie
+            start (int): indice de la cellule de départ dans la grille aplatie
+            goal (int): indice de l'arrivée dans la grille aplatie
+        Returns:
+            list: indices des cellules du chemin, de start à goal (vide si goal est inaccessible)
+        """
+        goal_x, goal_y = divmod(goal, width)
+        costs = {start: 0}
+        cells[start] = REACHED
+        start_x, start_y = divmod(start, width)
+        # à estimation égale on sort d'abord la cellule la plus avancée (coût le plus grand)
+        heap = [(max(abs(start_x-goal_x), abs(start_y-goal_y)), 0, start)]
+        while heap:
+            estimate, cost, cell = heappop(heap)
+            cost = -cost
+            if cell == goal:
+                return self.trace(cells, offsets, start, goal)
+            if cost > costs[cell]:
+                continue # déjà sortie avec un coût plus petit
+            cost += 1
+            for direction, offset in enumerate(offsets):
+                neighbour = cell + offset
+                if cells[neighbour] != 1 and cost < costs.get(neighbour, cost+1):
+                    costs[neighbour] = cost
+                    cells[neighbour] = REACHED | direction # on retient d'où on vient
+                    i, j = divmod(neighbour, width)
+                    heappush(heap, (cost + max(abs(i-goal_x), abs(j-goal_y)), -cost, neighbour))
+        return []
+
+    def bidirectional_search(self, cells:memoryview, offsets:list, start:int, goal:int):
+        """
+        parcours en largeur lancé depuis les deux extrémités, on avance à chaque fois le plus petit front
+        d'un niveau et on s'arrête à la première rencontre (qui donne forcément un plus court chemin)
+        Args:
+            cells (memoryview): grille aplatie avec une bordure de murs (1 pour un mur, 0 sinon)
+            offsets (list): déplacement dans la grille aplatie pour chaque direction (symétriques)
+            start (int): indice de la cellule de départ dans la grille aplatie
+            goal (int): indice de l'arrivée dans la grille aplatie
+        Returns:
+            list: indices des cellules du chemin, de start à goal (vide si goal est inaccessible)
+        """
+        if start == goal:
+            return [start]
+        # le côté du départ marque ses cellules avec REACHED, celui de l'arrivée avec REACHED | GOAL_SIDE
+        cells[start] = REACHED
+        cells[goal] = REACHED | GOAL_SIDE
+        frontiers = [[start], [goal]]
+        while frontiers[0] and frontiers[1]:
+            side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            own = REACHED | (GOAL_SIDE if side else 0)
+            next_frontier = []
+            for cell in frontiers[side]:
+                for direction, offset in enumerate(offsets):
+                    neighbour = cell + offset
+                    mark = cells[neighbour]
+                    if mark == 0:
+                        cells[neighbour] = own | direction
+                        next_frontier.append(neighbour)
+                    elif mark & REACHED and mark & GOAL_SIDE != own & GOAL_SIDE:
+                        # rencontre avec l'autre parcours
+                        if side == 1:
+                            cell, neighbour = neighbour, cell
+                        # de start jusqu'à la rencontre, puis de la rencontre jusqu'à goal
+                        return self.trace(cells, offsets, start, cell) + self.trace(cells, offsets, goal, neighbour)[::-1]
+            frontiers[side] = next_frontier
+        return []
+
+    @staticmethod
+    def trace(cells:memoryview, offsets:list, origin:int, cell:int):
+        """
+        remonte les directions retenues dans la grille depuis une cellule jusqu'au point de départ du parcours
+        Args:
+            cells (memoryview): grille aplatie (chaque cellule atteinte garde sa direction d'arrivée)
+            offsets (list): déplacement dans la grille aplatie pour chaque direction
+            origin (int): point de départ du parcours
+            cell (int): cellule d'arrivée
+        Returns:
+            list: cellules du point de départ jusqu'à cell
+        """
+        path = [cell]
+        while cell != origin:
+            cell -= offsets[cells[cell] & 7]
+            path.append(cell)
+        return path[::-1]
 
     def dijkstra(self):
         """
         calcule les distances Dijkstra de chaque cellule par rapport à l'arrivée
+        (parcours en largeur itératif, chaque cellule n'est visitée qu'une fois)
+        les murs valent -1 et les cellules inaccessibles gardent la valeur size**2
+        """
+        if self.map_goal is not None and self.map_goal != self.goal:
+            # les distances de l'ancienne arrivée restent disponibles dans le cache
+            self.store_field(frozenset([self.map_goal]), np.array(self.map))
+        field = self.drop_field(frozenset([self.goal]))
+        if field is None:
+            self.compute_distances([self.goal], self.map)
+        else:
+            # distances déjà calculées pour cette arrivée (les phéromones y sont reportées par set_pheromone)
+            for row in range(0, self.size, TILE_ROWS):
+                self.map[row:row+TILE_ROWS] = field[row:row+TILE_ROWS]
+            self.map[self.goal] = 0 # comme compute_distances, même si l'arrivée a été bouchée entre-temps
+        self.update_moves()
+        self.map_goal = self.goal
+        self.flush()
+
+    def compute_distances(self, goals:list, out:np.ndarray):
         """
-        for i in range(self.size):
-            for j in range(self.size):
-                if self.maze[i][j][0] == 0:
-                    self.map[i][j] = -1 # mur
-        # l'arrivée a forcément une distance de 0
-        self.map[self.goal[0]][self.goal[1]] = 0
-        # on incrémente à partir de l'arrivée
-        self.increment_neighbours(self.goal[0], self.goal[1], 1)
+        parcours en largeur depuis une ou plusieurs arrivées
+        (chaque cellule reçoit la distance à l'arrivée la plus proche)
+        Args:
+            goals (list): coordonnées des arrivées
+            out (np.ndarray): matrice (size x size) où écrire les distances
+        """
+        n = self.size
+        width = n + 2
+        # grille aplatie avec une bordure de murs (pas besoin de tester les bords)
+        blocked = self.scratch((width, width), np.uint8)
+        distances = self.scratch((width, width), out.dtype)
+        self.pad(blocked, ~self.grid, 1) # murs et cellules bouchées par les phéromones
+        offsets = [move[0]*width + move[1] for move in self.cardinal.values()]
+        blocked_cells = memoryview(blocked.reshape(-1))
+        cell_distances = memoryview(distances.reshape(-1))
+        # les arrivées ont forcément une distance de 0
+        frontier = []
+        for goal in goals:
+            cell = (goal[0]+1)*width + goal[1]+1
+            blocked_cells[cell] = 1
+            cell_distances[cell] = 0
+            frontier.append(cell)
+        # on avance niveau par niveau à partir des arrivées
+        cpt = 0
+        while frontier:
+            cpt += 1
+            next_frontier = []
+            for cell in frontier:
+                for offset in offsets:
+                    neighbour = cell + offset
+                    if not blocked_cells[neighbour]:
+                        blocked_cells[neighbour] = 1
+                        cell_distances[neighbour] = cpt
+                        next_frontier.append(neighbour)
+            frontier = next_frontier
+        blocked_cells.release()
+        cell_distances.release()
+        # les cellules ouvertes non atteintes gardent la valeur size**2
+        for row in range(0, n, TILE_ROWS):
+            end = min(row+TILE_ROWS, n)
+            out[row:end] = np.where(~self.grid[row:end], -1,
+                                    np.where(blocked[row+1:end+1, 1:-1] == 1, distances[row+1:end+1, 1:-1], n*n))
+        for goal in goals:
+            out[goal[0]][goal[1]] = 0
+        del blocked, distances
 
-    def increment_neighbours(self, x:int, y:int, cpt:int):
+    def distance_field(self, goals):
         """
-        incrémente les distances de Dijkstra des cellules voisines récursivement
+        renvoie les distances Dijkstra par rapport à une arrivée ou à un ensemble d'arrivées
+        les matrices déjà calculées sont gardées dans un cache (les moins récemment utilisées sont
+        supprimées quand le cache dépasse field_cache_bytes), la matrice de l'arrivée du labyrinthe est self.map
         Args:
-            x (int): coordonnées en x
-            y (int): coordonnées en y
-            cpt (int): compteur de distance
-        """
-        for direction in self.cardinal:
-            i = x+self.cardinal[direction][0]
-            j = y+self.cardinal[direction][1]
-            # tant qu'on est dans le labyrinthe
-            if (i>=0 and i<self.size) and (j>=0 and j<self.size):
-                # et que la voisine à une distance plus grande
-                if self.map[i][j] > cpt:
-                    self.map[i][j] = cpt
-                    self.increment_neighbours(i,j,cpt+1)
-    
-    def generate(self):
+            goals (tuple ou list): coordonnées d'une arrivée (x, y) ou liste de coordonnées d'arrivées
+        Returns:
+            np.ndarray: matrice des distances (à ne pas modifier)
+        """
+        if len(goals) == 2 and np.ndim(goals[0]) == 0:
+            goals = [goals]
+        key = frozenset((int(x), int(y)) for x, y in goals)
+        if key == {self.map_goal}:
+            return self.map
+        if key in self.fields:
+            self.fields.move_to_end(key) # la plus récemment utilisée
+            return self.fields[key]
+        field = np.empty((self.size, self.size), dtype=self.map.dtype)
+        self.compute_distances(sorted(key), field)
+        self.store_field(key, field)
+        return field
+
+    def store_field(self, key:frozenset, field:np.ndarray):
         """
-        génère le labyrinthe en utilisant l'algo décrit dans le tp
+        ajoute une matrice de distances au cache et supprime les moins récemment utilisées
+        si le cache dépasse field_cache_bytes
+        Args:
+            key (frozenset): ensemble des arrivées
+            field (np.ndarray): matrice des distances
         """
-        self.change_color(self.start[0], self.start[1])
-        next_cell = (self.start[0], self.start[1]) # on commence par le départ
-        self.pile.add(next_cell)
-        while self.pile.get_size() > 0: # tant que la pile n'est pas vide
-            # on cherche une cellule voisine éligible
-            next_cell = self.check_neighbours(next_cell[0], next_cell[1])
-            if next_cell: # si on en trouve une
-                self.pile.add(next_cell) # on l'ajoute à la pile
-                self.change_color(next_cell[0], next_cell[1]) # on la marque comme chemin
-            else: # sinon on dépile
-                next_cell = self.pile.depile()
-        self.empty_maze = self.maze.copy()
+        self.drop_field(key)
+        self.fields[key] = field
+        self.fields_bytes += field.nbytes
+        self.set_field_cache_size(self.field_cache_bytes)
 
-    def check_neighbours(self, x:int, y:int):
+    def drop_field(self, key:frozenset):
         """
-        renvoie aléatoirement une cellule voisine éligible
+        retire une matrice de distances du cache
         Args:
-            x (int): coordonnées en x
-            y (int): coordonnées en y
+            key (frozenset): ensemble des arrivées
         Returns:
-            tuple (int, int): coordonnées de la cellule éligible, None sinon
-        """
-        cardinal = self.cardinal.copy()
-        for k in range(8): # on essaye les 8 directions
-            direction = rd.choice(list(cardinal.keys())) # on prend une direction aléatoire
-            i = x+cardinal[direction][0]
-            j = y+cardinal[direction][1]
-            # tant qu'on est dans le labyrinthe
-            if (i>=0 and i<self.size) and (j>=0 and j<self.size):
-                # et si la cellule est éligible
-                if self.check_elegibility(i, j):
-                    return i, j
-                else:
-                    del(cardinal[direction])
-        return None
-    
-    def check_elegibility(self, x:int, y:int):
+            np.ndarray: la matrice retirée (None si elle n'était pas dans le cache)
+        """
+        field = self.fields.pop(key, None)
+        if field is not None:
+            self.fields_bytes -= field.nbytes
+        return field
+
+    def clear_fields(self):
+        """
+        vide le cache des matrices de distances (à appeler quand des cellules sont creusées :
+        les distances gardées ne sont plus justes)
         """
-        vérifie si la cellule est éligible (possède exactement un voisin non mur)
+        self.fields.clear()
+        self.fields_bytes = 0
+
+    def set_field_cache_size(self, max_bytes:int):
+        """
+        définit la taille maximale du cache des matrices de distances
         Args:
-            x (int): coordonnées en x
-            y (int): coordonnées en y
-        Returns:
-            bool: True si la cellule est éligible, False sinon
+            max_bytes (int): nombre d'octets maximum (la dernière matrice calculée est toujours gardée)
         """
-        cpt = 0
-        for direction in self.cardinal:
-            i = x+self.cardinal[direction][0]
-            j = y+self.cardinal[direction][1]
-            # tant qu'on est dans le labyrinthe
-            if (i>=0 and i<self.size) and (j>=0 and j<self.size):
-                if self.maze[i][j][0] == 255:
-                    cpt += 1
-        # la cellule est éligible si elle a exactement un voisin non mur
-        return cpt == 1
+        self.field_cache_bytes = max_bytes
+        while self.fields_bytes > self.field_cache_bytes and len(self.fields) > 1:
+            self.drop_field(next(iter(self.fields)))
+
+    def update_moves(self):
+        """
+        recalcule l'index des mouvements légaux à partir des distances (par bandes de lignes)
+        une cellule est ouverte si sa distance ne vaut pas -1, les bords du labyrinthe sont fermés
+        """
+        n = self.size
+        for row in range(0, n, TILE_ROWS):
+            end = min(row+TILE_ROWS, n)
+            # cellules ouvertes de la bande, avec une ligne de plus de chaque côté et une bordure fermée
+            band = np.zeros((end-row+2, n+2), dtype=np.uint8)
+            low, high = max(row-1, 0), min(end+1, n)
+            band[low-row+1:high-row+1, 1:-1] = self.map[low:high] != -1
+            moves = np.zeros((end-row, n), dtype=np.uint8)
+            for direction, (dx, dy) in self.cardinal.items():
+                moves |= band[1+dx:end-row+1+dx, 1+dy:n+1+dy] << direction
+            self.moves[row:end] = moves
+
+    def pad(self, padded:np.ndarray, interior:np.ndarray, border:int):
+        """
+        remplit une grille avec bordure (size+2 x size+2) par bandes de lignes
+        Args:
+            padded (np.ndarray): grille avec bordure à remplir
+            interior (np.ndarray ou int): valeurs de l'intérieur (size x size) ou valeur unique
+            border (int): valeur de la bordure
+        """
+        padded[0] = border
+        padded[-1] = border
+        for row in range(0, self.size, TILE_ROWS):
+            end = min(row+TILE_ROWS, self.size)
+            band = padded[row+1:end+1]
+            band[:, 0] = border
+            band[:, -1] = border
+            band[:, 1:-1] = interior[row:end] if np.ndim(interior) else interior
     
-    def is_dead_end(self, x:int, y:int):
+    def generate(self):
+        """
+        génère le labyrinthe en utilisant l'algo décrit dans le tp
+        (une cellule est éligible si elle a exactement un voisin non mur parmi ses 8 voisins)
+        le nombre de voisins ouverts de chaque cellule est mis à jour à chaque cellule creusée,
+        ce qui évite de rescanner les 8 voisins de chaque candidate
+        """
+        n = self.size
+        width = n + 2
+        offsets = [move[0]*width + move[1] for move in self.cardinal.values()]
+        # grilles aplaties avec une bordure : les cellules de la bordure ne sont jamais éligibles
+        neighbours_grid = self.scratch((width, width), np.uint8)
+        carved_grid = self.scratch((width, width), np.uint8)
+        self.pad(neighbours_grid, 0, 9)
+        open_neighbours = memoryview(neighbours_grid.reshape(-1)) # nombre de voisins ouverts de chaque cellule
+        carved = memoryview(carved_grid.reshape(-1))
+        self.pile = Pile(min(n*n, 1 << 20))
+        self.change_color(self.start[0], self.start[1])
+        cell = (self.start[0]+1)*width + self.start[1]+1 # on commence par le départ
+        self.pile.add(cell)
+        while True:
+            if not carved[cell]: # on marque la cellule comme chemin
+                carved[cell] = 1
+                for offset in offsets:
+                    open_neighbours[cell+offset] += 1
+            # on cherche une cellule voisine éligible
+            candidates = [cell+offset for offset in offsets if open_neighbours[cell+offset] == 1]
+            if candidates: # si on en trouve une, on l'ajoute à la pile
+                cell = candidates[int(self.rng.random()*len(candidates))]
+                self.pile.add(cell)
+            elif self.pile.get_size() > 0: # sinon on dépile
+                cell = self.pile.depile()
+            else: # tant que la pile n'est pas vide
+                break
+        open_neighbours.release()
+        carved.release()
+        self.clear_fields()
+        # un labyrinthe rouvert sans écriture garde sa grille avant phéromones pour lui
+        self.empty_grid = self.buffer("empty_grid.bin", (n, n), bool) if self.owns_storage() else self.scratch((n, n), bool)
+        for row in range(0, n, TILE_ROWS):
+            end = min(row+TILE_ROWS, n)
+            self.grid[row:end] |= carved_grid[row+1:end+1, 1:-1].astype(bool)
+            self.empty_grid[row:end] = self.grid[row:end]
+        del neighbours_grid, carved_grid
+        self.flush()
+
+    def is_dead_end(self, x:int, y:int, goal:tuple=None):
         """
         vérifie si la cellule est une impasse (possède au plus un voisin non mur)
         Args:
             x (int): coordonnées en x
             y (int): coordonnées en y
+            goal (tuple (int, int)): arrivée à protéger (None pour l'arrivée du labyrinthe)
         Returns:
             bool: True si la cellule est une impasse, False sinon
         """
-        cpt = 0
-        for direction in self.cardinal:
-            i = x+self.cardinal[direction][0]
-            j = y+self.cardinal[direction][1]
-            # tant qu'on est dans le labyrinthe
-            if (i>=0 and i<self.size) and (j>=0 and j<self.size):
-                if self.maze[i][j][0] == 255:
-                    cpt += 1
-            if (i, j) == self.start or (i, j) == self.goal:
-                return False
-        return cpt <= 1
+        goal = self.goal if goal is None else goal
+        # une voisine du départ ou de l'arrivée n'est jamais bouchée
+        if max(abs(x - self.start[0]), abs(y - self.start[1])) == 1 or max(abs(x - goal[0]), abs(y - goal[1])) == 1:
+            return False
+        # nombre de voisines ouvertes = nombre de mouvements légaux
+        return bin(self.moves[x, y]).count("1") <= 1
     
-    def set_pheromone(self, x, y):
+    def set_pheromone(self, x, y, goal:tuple=None):
         """
         bouche une cellule en la transformant en mur
         Args:
             x (int): coordonnées en x
             y (int): coordonnées en y
+            goal (tuple (int, int)): arrivée à protéger (None pour l'arrivée du labyrinthe)
         """
-        if (x, y) != self.start and (x, y) != self.goal:
+        goal = self.goal if goal is None else goal
+        if (x, y) != self.start and (x, y) != self.goal and (x, y) != goal:
             self.map[x][y] = -1
-            self.change_color(x, y, [100, 100, 100]) 
-    
-    def change_color(self, x:int, y:int, color:list=[255, 255, 255]):
+            self.grid[x][y] = False
+            # les voisines ne peuvent plus venir sur cette cellule
+            for direction, (dx, dy) in self.cardinal.items():
+                i, j = x+dx, y+dy
+                if 0 <= i < self.size and 0 <= j < self.size:
+                    self.moves[i, j] &= 255 ^ (1 << (direction+4) % 8) # direction opposée
+            # une impasse n'est jamais sur un plus court chemin, les autres distances restent justes
+            for field in self.fields.values():
+                field[x][y] = -1
+
+    def change_color(self, x:int, y:int, color:list=PATH_COLOR):
         """
-        change la couleur d'une cellule avec la couleur donnée
+        change la couleur d'une cellule avec la couleur donnée (uniquement pour l'affichage)
         Args:
             x (int): coordonnées en x
             y (int): coordonnées en y
             color (list): couleur à appliquer
         """
-        self.maze[x][y] = color
+        self.colors[(x, y)] = color
+
+    def render(self, with_colors:bool=True):
+        """
+        construit l'image RGB du labyrinthe
+        (chemins en blanc, murs en noir, cellules bouchées par les phéromones en gris)
+        Args:
+            with_colors (bool): True pour ajouter les couleurs posées par change_color (départ, arrivée, solution)
+        Returns:
+            np.ndarray: image (n, n, 3) du labyrinthe
+        """
+        carved = self.grid if self.empty_grid is None else self.empty_grid
+        image = np.zeros((self.size, self.size, 3), dtype=np.uint8)
+        image[carved] = PATH_COLOR
+        image[carved & ~self.grid] = PHEROMONE_COLOR
+        if with_colors and self.colors:
+            cells = np.array(list(self.colors.keys()))
+            image[cells[:, 0], cells[:, 1]] = np.array(list(self.colors.values()), dtype=np.uint8)
+        return image
+
+    @property
+    def maze(self):
+        """
+        image RGB du labyrinthe (construite à chaque accès)
+
+        Returns:
+            np.ndarray: image (n, n, 3) du labyrinthe
+        """
+        return self.render()
+
+    @property
+    def empty_maze(self):
+        """
+        image RGB du labyrinthe juste après la génération (sans phéromones ni couleurs)
+
+        Returns:
+            np.ndarray: image (n, n, 3) du labyrinthe, None s'il n'a pas été généré
+        """
+        if self.empty_grid is None:
+            return None
+        image = np.zeros((self.size, self.size, 3), dtype=np.uint8)
+        image[self.empty_grid] = PATH_COLOR
+        return image
 
     def get_cardinal(self):
         """
@@ -228,6 +817,32 @@ class Maze:
         """
         return self.cardinal
     
+    def path_cells(self, start:tuple, path:list):
+        """
+        renvoie les cellules d'un chemin (sans boucle par pas : somme cumulée des mouvements)
+        Args:
+            start (tuple (int, int)): départ du chemin
+            path (list): directions du chemin (-1 pour un mouvement dans un mur, la cellule ne change pas)
+        Returns:
+            np.ndarray: coordonnées (k x 2) des cellules, du départ à la dernière cellule atteinte
+        """
+        path = np.asarray(path, dtype=np.int64).reshape(-1)
+        moves = np.array([self.cardinal[direction] for direction in range(8)], dtype=np.int64)[path[path >= 0]]
+        cells = np.empty((len(moves) + 1, 2), dtype=np.int64)
+        cells[0] = start
+        np.cumsum(moves, axis=0, out=cells[1:])
+        cells[1:] += cells[0]
+        return cells
+
+    def get_moves(self):
+        """
+        renvoie l'index des mouvements légaux
+
+        Returns:
+            np.ndarray: matrice (size x size), le bit d d'une cellule vaut 1 si on peut aller dans la direction d
+        """
+        return self.moves
+
     def get_size(self):
         """
         renvoie la taille du labyrinthe
@@ -264,7 +879,7 @@ class Maze:
         Returns:
             int: distance Dijkstra
         """
-        return self.map[x][y]
+        return int(self.map[x][y])
     
     def is_valid(self, postion:tuple, move:tuple):
         """
@@ -275,20 +890,19 @@ class Maze:
         Returns:
             bool: True si le mouvement est valide (dans le labyrinthe et pas un mur), False sinon
         """
+        direction = self.directions.get((move[0], move[1]))
+        if direction is not None:
+            return bool(self.moves[postion[0], postion[1]] >> direction & 1)
         i = postion[0]+move[0]
         j = postion[1]+move[1]
-        # tant qu'on est dans le labyrinthe
-        if (i>=0 and i<self.size) and (j>=0 and j<self.size):
-            # et que ce n'est pas un mur
-            if self.map[i][j] != -1:
-                return True
-        return False
+        # autre mouvement : tant qu'on est dans le labyrinthe et que ce n'est pas un mur
+        return 0 <= i < self.size and 0 <= j < self.size and self.map[i][j] != -1
 
     def display_soluce(self):
         """
         affiche le labyrinthe avec la solution dijkstra (en rouge)
         """
-        img = Image.fromarray(self.maze)
+        img = Image.fromarray(self.render())
         img.show()
     
     def display_map(self):
@@ -302,7 +916,7 @@ class Maze:
         """
         affiche le labyrinthe
         """
-        img = Image.fromarray(self.maze)
+        img = Image.fromarray(self.render())
         img.show()
 
     def display_runner(self, runner):
@@ -312,15 +926,10 @@ class Maze:
         Args:
             runner (Runner): le runner à afficher
         """
-        runner_on_maze = self.maze.copy()
-        cell = list(runner.get_start()) # position de départ
-        path = runner.get_path()
-        for direction in path:
-            if direction >=0: # si le mouvement n'est pas dans un mur ou en dehors du labyrinthe
-                move = self.cardinal[direction]
-                runner_on_maze[cell[0]][cell[1]] = [0,255,0] # on colorie la cellule en vert
-                cell[0] += move[0]
-                cell[1] += move[1]
+        runner_on_maze = self.render()
+        # on colorie en vert les cellules quittées par le runner (toutes sauf la dernière)
+        cells = self.path_cells(runner.get_start(), runner.get_path())[:-1]
+        runner_on_maze[cells[:, 0], cells[:, 1]] = [0,255,0]
         # on colorie l'arrivée en rouge et le départ en bleu
         runner_on_maze[self.goal[0]][self.goal[1]] = [255,0,0]
         runner_on_maze[self.start[0]][self.start[1]] = [0,0,255]
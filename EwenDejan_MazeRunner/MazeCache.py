@@ -0,0 +1,61 @@
+import hashlib
+import os
+from Maze import Maze, GENERATOR
+
+
+class MazeCache:
+    """
+    Classe gérant un cache de labyrinthes sur le disque.
+    Un labyrinthe est identifié par (taille, graine, algorithme de génération) :
+    s'il a déjà été généré et résolu, il est rechargé directement depuis son fichier (sans copie).
+    """
+    def __init__(self, directory:str):
+        """ constructeur de MazeCache
+        Args:
+            directory (str): dossier des labyrinthes enregistrés
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, size:int, seed:int, generator:str=GENERATOR):
+        """
+        renvoie le chemin du fichier d'un labyrinthe (nommé d'après le hash de sa clé)
+        Args:
+            size (int): taille du labyrinthe
+            seed (int): graine du labyrinthe
+            generator (str): algorithme de génération
+        Returns:
+            str: chemin du fichier
+        """
+        key = f"{generator}:{size}:{seed}".encode()
+        return os.path.join(self.directory, hashlib.sha1(key).hexdigest() + ".maze")
+
+    def get(self, size:int, seed:int, generator:str=GENERATOR, mode:str="c"):
+        """
+        renvoie le labyrinthe (généré, avec son arrivée et ses distances Dijkstra)
+        le génère et l'enregistre s'il n'est pas encore dans le cache
+        Args:
+            size (int): taille du labyrinthe
+            seed (int): graine du labyrinthe
+            generator (str): algorithme de génération (seul GENERATOR sait être généré)
+            mode (str): mode d'ouverture du fichier (voir Maze.load)
+        Returns:
+            Maze: le labyrinthe
+        """
+        path = self.path(size, seed, generator)
+        if not os.path.exists(path):
+            if generator != GENERATOR:
+                raise ValueError(f"algorithme de génération inconnu : {generator}")
+            maze = Maze(size, seed=seed)
+            maze.generate()
+            maze.solve_from_random_coordonnates()
+            maze.save(path)
+        return Maze.load(path, mode)
+
+    def clear(self):
+        """
+        supprime tous les labyrinthes du cache
+        """
+        for name in os.listdir(self.directory):
+            if name.endswith(".maze"):
+                os.remove(os.path.join(self.directory, name))
@@ -0,0 +1,247 @@
+import csv
+import os
+import tempfile
+import numpy as np
+
+
+# statistiques enregistrées à chaque génération par GeneticAlgo
+METRICS = ("best_fitness", "fitness_avg", "length")
+
+class MetricsSink:
+    """
+    Classe recevant les statistiques de chaque génération.
+    Les dernières générations sont gardées telles quelles dans un tampon circulaire de capacity lignes,
+    les plus anciennes sont moyennées par paquets dans une archive de taille fixe (les paquets grossissent
+    quand l'archive est pleine) : la mémoire reste bornée quel que soit le nombre de générations.
+    Les statistiques peuvent aussi être écrites au fur et à mesure dans un fichier CSV (conservé en cas d'arrêt brutal).
+    """
+    def __init__(self, path:str=None, capacity:int=None, archive_capacity:int=1024, fields:tuple=METRICS, flush_interval:int=1):
+        """ constructeur de MetricsSink
+        Args:
+            path (str): fichier CSV où écrire chaque génération (None pour ne rien écrire)
+            capacity (int): nombre de générations gardées telles quelles (None pour toutes les garder)
+            archive_capacity (int): nombre de paquets de l'archive des générations plus anciennes
+            fields (tuple): noms des statistiques
+            flush_interval (int): nombre de générations entre deux écritures du fichier sur le disque
+        """
+        self.fields = tuple(fields)
+        self.index = {field: k for k, field in enumerate(self.fields)}
+        self.capacity = capacity
+        self.count = 0 # nombre de générations reçues
+        self.recent = np.empty((capacity or 64, len(self.fields)), dtype=np.float64)
+        # archive : moyenne de chaque paquet de archive_factor générations et numéro de sa première génération
+        # (taille paire pour pouvoir fusionner les paquets deux à deux)
+        archive_capacity = max(2, archive_capacity + archive_capacity % 2)
+        self.archive = np.empty((archive_capacity, len(self.fields)), dtype=np.float64)
+        self.archive_generations = np.empty(archive_capacity, dtype=np.int64)
+        self.archive_size = 0
+        self.archive_factor = 1
+        self.pending = np.zeros(len(self.fields), dtype=np.float64) # paquet en cours de remplissage
+        self.pending_count = 0
+        self.pending_generation = 0
+        self.path = path
+        self.flush_interval = flush_interval
+        self.file = None
+        if path is not None:
+            new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+            self.file = open(path, "a", newline="")
+            self.writer = csv.writer(self.file)
+            if new_file:
+                self.writer.writerow(("generation",) + self.fields)
+                self.file.flush()
+
+    def append(self, *values):
+        """
+        enregistre les statistiques d'une génération
+        Args:
+            *values (float): une valeur par statistique, dans l'ordre de fields
+        """
+        generation = self.count
+        if self.capacity is None:
+            if generation == len(self.recent):
+                self.recent = np.concatenate((self.recent, np.empty_like(self.recent))) # on double la taille
+            self.recent[generation] = values
+        else:
+            row = generation % self.capacity
+            if generation >= self.capacity:
+                self.archive_row(generation - self.capacity, self.recent[row])
+            self.recent[row] = values
+        self.count += 1
+        if self.file is not None:
+            self.writer.writerow((generation,) + values)
+            if self.count % self.flush_interval == 0:
+                self.file.flush()
+
+    def archive_row(self, generation:int, values:np.ndarray):
+        """
+        ajoute une génération sortie du tampon circulaire au paquet en cours de l'archive
+        Args:
+            generation (int): numéro de la génération
+            values (np.ndarray): statistiques de la génération
+        """
+        if self.pending_count == 0:
+            self.pending_generation = generation
+        self.pending += values
+        self.pending_count += 1
+        if self.pending_count < self.archive_factor:
+            return
+        if self.archive_size == len(self.archive):
+            # archive pleine : on fusionne les paquets deux à deux
+            half = self.archive_size // 2
+            self.archive[:half] = (self.archive[0:2*half:2] + self.archive[1:2*half:2]) / 2
+            self.archive_generations[:half] = self.archive_generations[0:2*half:2]
+            self.archive_size = half
+            self.archive_factor *= 2
+            if self.pending_count < self.archive_factor:
+                return # le paquet en cours continue avec la nouvelle taille
+        self.archive[self.archive_size] = self.pending / self.pending_count
+        self.archive_generations[self.archive_size] = self.pending_generation
+        self.archive_size += 1
+        self.pending.fill(0)
+        self.pending_count = 0
+
+    def series(self, field:str):
+        """
+        renvoie une statistique sur toutes les générations gardées
+        (les générations archivées sont remplacées par la moyenne de leur paquet)
+        Args:
+            field (str): nom de la statistique
+        Returns:
+            tuple (np.ndarray, np.ndarray): numéros des générations et valeurs
+        """
+        column = self.index[field]
+        if self.capacity is None or self.count <= self.capacity:
+            return np.arange(self.count), self.recent[:self.count, column].copy()
+        # tampon circulaire remis dans l'ordre
+        first = self.count - self.capacity
+        order = (np.arange(first, self.count)) % self.capacity
+        generations = [self.archive_generations[:self.archive_size], np.arange(first, self.count)]
+        values = [self.archive[:self.archive_size, column], self.recent[order, column]]
+        if self.pending_count:
+            generations.insert(1, np.array([self.pending_generation]))
+            values.insert(1, np.array([self.pending[column] / self.pending_count]))
+        return np.concatenate(generations), np.concatenate(values)
+
+    def values(self, field:str):
+        """
+        renvoie les valeurs d'une statistique sur toutes les générations gardées
+        Args:
+            field (str): nom de la statistique
+        Returns:
+            list: valeurs (une par génération gardée ou par paquet archivé)
+        """
+        return self.series(field)[1].tolist()
+
+    def last(self, field:str):
+        """
+        renvoie la valeur d'une statistique à la dernière génération
+        Args:
+            field (str): nom de la statistique
+        Returns:
+            float: valeur (None si aucune génération n'a été reçue)
+        """
+        if self.count == 0:
+            return None
+        row = self.count - 1 if self.capacity is None else (self.count - 1) % self.capacity
+        return float(self.recent[row, self.index[field]])
+
+    def get_state(self):
+        """
+        renvoie l'état du tampon et de l'archive (pour une sauvegarde de l'algorithme génétique)
+
+        Returns:
+            dict: tableaux numpy et compteurs
+        """
+        return {
+            "recent": self.recent[:self.count if self.capacity is None else self.capacity].copy(),
+            "archive": self.archive[:self.archive_size].copy(),
+            "archive_generations": self.archive_generations[:self.archive_size].copy(),
+            "pending": self.pending.copy(),
+            "counters": np.array([self.count, self.archive_factor, self.pending_count, self.pending_generation], dtype=np.int64),
+        }
+
+    def set_state(self, state:dict):
+        """
+        restaure l'état renvoyé par get_state (la capacité doit être la même)
+        les lignes du fichier CSV éventuel écrites après la sauvegarde sont supprimées (voir truncate_file)
+        Args:
+            state (dict): état du tampon et de l'archive
+        """
+        self.count, self.archive_factor, self.pending_count, self.pending_generation = (int(value) for value in state["counters"])
+        recent = state["recent"]
+        if self.capacity is None:
+            self.recent = np.empty((max(64, len(recent)), len(self.fields)), dtype=np.float64)
+        elif len(recent) != self.capacity:
+            raise ValueError("la capacité du MetricsSink ne correspond pas à celle de la sauvegarde")
+        self.recent[:len(recent)] = recent
+        self.archive_size = len(state["archive"])
+        if self.archive_size > len(self.archive):
+            raise ValueError("l'archive du MetricsSink est plus petite que celle de la sauvegarde")
+        self.archive[:self.archive_size] = state["archive"]
+        self.archive_generations[:self.archive_size] = state["archive_generations"]
+        self.pending[:] = state["pending"]
+        self.truncate_file()
+
+    def truncate_file(self):
+        """
+        supprime du fichier CSV les lignes des générations pas encore reçues (numéro >= self.count)
+        pour qu'une reprise depuis une sauvegarde ne les écrive pas deux fois
+        """
+        if self.file is None:
+            return
+        self.file.close()
+        with open(self.path, newline="") as file:
+            rows = list(csv.reader(file))
+        directory = os.path.dirname(os.path.abspath(self.path))
+        with tempfile.NamedTemporaryFile("w", dir=directory, suffix=".tmp", newline="", delete=False) as file:
+            try:
+                writer = csv.writer(file)
+                writer.writerow(("generation",) + self.fields)
+                for row in rows[1:]:
+                    # une ligne coupée par un arrêt brutal est supprimée aussi
+                    if len(row) == len(self.fields) + 1 and int(row[0]) < self.count:
+                        writer.writerow(row)
+            except BaseException:
+                file.close()
+                os.remove(file.name)
+                raise
+        os.replace(file.name, self.path) # le fichier n'est remplacé qu'une fois complet
+        self.file = open(self.path, "a", newline="")
+        self.writer = csv.writer(self.file)
+
+    def __len__(self):
+        """
+        renvoie le nombre de générations reçues
+
+        Returns:
+            int: nombre de générations
+        """
+        return self.count
+
+    def close(self):
+        """
+        ferme le fichier CSV (les statistiques restent lisibles en mémoire)
+        """
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    @classmethod
+    def load(cls, path:str, capacity:int=None, archive_capacity:int=1024):
+        """
+        relit un fichier CSV écrit par un MetricsSink (par exemple après un arrêt brutal)
+        Args:
+            path (str): fichier CSV
+            capacity (int): nombre de générations gardées telles quelles (None pour toutes les garder)
+            archive_capacity (int): nombre de paquets de l'archive des générations plus anciennes
+        Returns:
+            MetricsSink: les statistiques du fichier (sans fichier associé)
+        """
+        with open(path, newline="") as file:
+            reader = csv.reader(file)
+            header = next(reader)
+            sink = cls(capacity=capacity, archive_capacity=archive_capacity, fields=header[1:])
+            for row in reader:
+                if len(row) == len(header): # une ligne coupée par un arrêt brutal est ignorée
+                    sink.append(*(float(value) for value in row[1:]))
+        return sink
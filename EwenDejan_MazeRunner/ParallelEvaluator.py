@@ -0,0 +1,232 @@
+import multiprocessing as mp
+import weakref
+from multiprocessing import shared_memory
+import numpy as np
+from BatchSimulator import BatchSimulator
+from Runner import Runner, GENE_BLOCK
+
+
+# état de chaque processus du pool (rempli par init_worker)
+worker_state = {}
+
+class SharedMaze:
+    """
+    Classe donnant aux processus du pool une vue du labyrinthe posée en mémoire partagée.
+    Elle expose les mêmes getters que Maze (ceux dont BatchSimulator a besoin), sans copier le Maze.
+    """
+    def __init__(self, maze_map:np.ndarray, start:tuple, goal:tuple, cardinal:dict):
+        """ constructeur de SharedMaze
+        Args:
+            maze_map (np.ndarray): matrice des distances Dijkstra de l'arrivée du labyrinthe (en mémoire partagée)
+            start (tuple (int, int)): coordonnées du départ
+            goal (tuple (int, int)): coordonnées de l'arrivée
+            cardinal (dict): directions cardinales
+        """
+        self.map = maze_map
+        self.size = maze_map.shape[0]
+        self.start = start
+        self.goal = goal
+        self.cardinal = cardinal
+
+    def get_size(self):
+        """
+        renvoie la taille du labyrinthe
+
+        Returns:
+            int: taille du labyrinthe
+        """
+        return self.size
+
+    def get_start(self):
+        """
+        renvoie les coordonnées du départ
+
+        Returns:
+            tuple (int, int): coordonnées du départ
+        """
+        return self.start
+
+    def get_goal(self):
+        """
+        renvoie les coordonnées de l'arrivée
+
+        Returns:
+            tuple (int, int): coordonnées de l'arrivée
+        """
+        return self.goal
+
+    def get_cardinal(self):
+        """
+        renvoie les directions cardinales
+
+        Returns:
+            dict: directions cardinales
+        """
+        return self.cardinal
+
+
+def init_worker(buffers:dict, start:tuple, cardinal:dict, score):
+    """
+    initialise un processus du pool : se rattache aux mémoires partagées
+    Args:
+        buffers (dict): nom -> (nom de la mémoire partagée, forme, dtype)
+        start (tuple (int, int)): coordonnées du départ
+        cardinal (dict): directions cardinales
+        score (function): calcul de la fitness à partir des compteurs du parcours
+    """
+    arrays = {}
+    for key, (name, shape, dtype) in buffers.items():
+        shm = shared_memory.SharedMemory(name=name)
+        worker_state["shm_" + key] = shm # garde la mémoire ouverte tant que le processus vit
+        arrays[key] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    worker_state.update(arrays)
+    worker_state["simulator"] = BatchSimulator(SharedMaze(arrays["map"], start, None, cardinal))
+    worker_state["score"] = score
+
+
+def evaluate_chunk(task:tuple):
+    """
+    parcours + fitness d'une tranche de la population (exécuté dans un processus du pool)
+    les chemins parcourus sont écrits dans la mémoire partagée "paths"
+    avec lazy, la suite des ADN est tirée dans le processus à partir des graines des runners (voir Runner.draw_genes)
+    Args:
+        task (tuple (int, int, tuple, int, bool)): indices du premier et après le dernier runner de la tranche,
+            arrivée visée, nombre de colonnes de "dna" remplies et True pour tirer la suite des ADN à la demande
+    Returns:
+        tuple: (fitness, last_cells, reached_goal, lengths, walls, available) de la tranche
+    """
+    low, high, goal, width, lazy = task
+    distances = worker_state["distances"]
+    simulator = worker_state["simulator"]
+    simulator.set_goal(goal) # l'arrivée peut changer d'une génération à l'autre
+    dna = worker_state["dna"][low:high, :width]
+    if lazy:
+        seeds = worker_state["gene_seeds"][low:high].tolist()
+        max_length = worker_state["dna"].shape[1]
+        def fetch(rows, step):
+            # même règle que Runner.journey : GENE_BLOCK gènes de plus à chaque fois
+            end = min(step + GENE_BLOCK, max_length)
+            genes = np.stack([Runner.draw_genes(seeds[k], step, end) for k in rows.tolist()])
+            return np.full(len(rows), end, dtype=np.int64), genes
+        result = simulator.run(dna, available=worker_state["available"][low:high], fetch=fetch, max_length=max_length)
+    else:
+        result = simulator.run(dna)
+    worker_state["paths"][low:high, :result["paths"].shape[1]] = result["paths"]
+    last_cells = result["last_cells"]
+    dist = distances[last_cells[:, 0], last_cells[:, 1]].astype(np.int64)
+    fitness = worker_state["score"](result["walls"], result["backtracks"], result["discoveries"], dist, result["lengths"], result["reached_goal"])
+    # on n'écrit que des 1 : pas de conflit entre processus
+    worker_state["explored"][result["explored"]] = 1
+    return fitness, last_cells, result["reached_goal"], result["lengths"], result["walls"], result["available"]
+
+
+class ParallelEvaluator:
+    """
+    Classe évaluant la population sur plusieurs processus.
+    Le labyrinthe (matrice des distances) et l'ADN de la population sont posés en mémoire partagée,
+    chaque processus évalue une tranche de la population, écrit les chemins parcourus en mémoire partagée
+    et ne renvoie que des scalaires (fitness, dernière cellule, but atteint, longueur, coups dans les murs),
+    le Maze n'est jamais envoyé aux processus. L'arrivée est envoyée avec chaque tranche.
+    """
+    def __init__(self, maze, pop_size:int, dna_length:int, score, n_workers:int=None, chunks_per_worker:int=4, goal:tuple=None):
+        """ constructeur de ParallelEvaluator
+        Args:
+            maze (Maze): labyrinthe parcouru
+            pop_size (int): taille de la population
+            dna_length (int): longueur de l'ADN des runners
+            score (function): calcul de la fitness à partir des compteurs du parcours (doit être picklable)
+            n_workers (int): nombre de processus (None pour un processus par coeur)
+            chunks_per_worker (int): nombre de tranches de population par processus et par génération
+            goal (tuple (int, int)): arrivée visée par défaut (None pour l'arrivée du labyrinthe au moment de chaque évaluation)
+        """
+        self.maze = maze
+        self.goal = goal
+        self.pop_size = pop_size
+        self.dna_length = dna_length
+        self.n_workers = n_workers or mp.cpu_count()
+        size = maze.get_size()
+        self.shm = {}
+        self.arrays = {}
+        buffers = {}
+        for key, shape, dtype in (("map", (size, size), maze.map.dtype), ("distances", (size, size), maze.map.dtype),
+                                  ("dna", (pop_size, dna_length), np.uint8), ("paths", (pop_size, dna_length), np.int8),
+                                  ("available", (pop_size,), np.int64), ("gene_seeds", (pop_size,), np.uint64),
+                                  ("explored", (size, size), np.bool_)):
+            nbytes = max(1, int(np.prod(shape)) * np.dtype(dtype).itemsize)
+            shm = shared_memory.SharedMemory(create=True, size=nbytes)
+            self.shm[key] = shm
+            self.arrays[key] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+            buffers[key] = (shm.name, shape, np.dtype(dtype).str)
+        n_chunks = min(pop_size, self.n_workers * chunks_per_worker)
+        limits = np.linspace(0, pop_size, n_chunks + 1).astype(int)
+        self.chunks = [(int(limits[k]), int(limits[k+1])) for k in range(n_chunks)]
+        self.pool = mp.Pool(self.n_workers, initializer=init_worker,
+                            initargs=(buffers, maze.get_start(), maze.get_cardinal(), score))
+        # libère le pool et les mémoires partagées même si close n'est pas appelé
+        self.finalizer = weakref.finalize(self, ParallelEvaluator.release, self.pool, list(self.shm.values()))
+
+    def evaluate(self, dna:np.ndarray, goal:tuple=None, available:np.ndarray=None, gene_seeds:np.ndarray=None):
+        """
+        évalue toute la population
+        Args:
+            dna (np.ndarray): matrice (pop_size x n) des ADN des runners (n au plus dna_length, ValueError sinon)
+            goal (tuple (int, int)): arrivée visée (None pour l'arrivée donnée au constructeur ou celle du labyrinthe)
+            available (np.ndarray): nombre de gènes déjà tirés de chaque ADN, None si dna contient des ADN complets
+                (la suite est alors tirée par les processus à partir de gene_seeds, jusqu'à dna_length gènes)
+            gene_seeds (np.ndarray): graine des gènes de chaque runner (avec available)
+        Returns:
+            dict: fitness, last_cells, reached_goal, lengths, walls (un élément par runner),
+                paths (matrice des chemins parcourus, -1 pour un mur, comme BatchSimulator.run),
+                available (nombre de gènes lus ou tirés de chaque ADN, à reporter avec Runner.extend)
+                et explored (cellules visitées par au moins un runner)
+        """
+        if goal is None:
+            goal = self.maze.get_goal() if self.goal is None else self.goal
+        goal = (int(goal[0]), int(goal[1]))
+        # le labyrinthe change à chaque génération (phéromones), l'arrivée peut changer aussi
+        self.arrays["map"][:] = self.maze.map
+        self.arrays["distances"][:] = self.maze.distance_field(goal)
+        width = dna.shape[1]
+        if dna.shape[0] != self.pop_size or width > self.dna_length:
+            raise ValueError(f"matrice d'ADN {dna.shape} incompatible avec la mémoire partagée ({self.pop_size} lignes, au plus {self.dna_length} colonnes)")
+        self.arrays["dna"][:, :width] = dna
+        lazy = available is not None
+        if lazy:
+            self.arrays["available"][:] = available
+            self.arrays["gene_seeds"][:] = gene_seeds
+        self.arrays["explored"].fill(False)
+        results = self.pool.map(evaluate_chunk, [(low, high, goal, width, lazy) for low, high in self.chunks])
+        return {
+            "fitness": np.concatenate([chunk[0] for chunk in results]),
+            "last_cells": np.concatenate([chunk[1] for chunk in results]),
+            "reached_goal": np.concatenate([chunk[2] for chunk in results]),
+            "lengths": np.concatenate([chunk[3] for chunk in results]),
+            "walls": np.concatenate([chunk[4] for chunk in results]),
+            "paths": self.arrays["paths"][:, :self.dna_length if lazy else width].copy(),
+            "available": np.concatenate([chunk[5] for chunk in results]),
+            "explored": self.arrays["explored"].copy(),
+        }
+
+    def close(self):
+        """
+        arrête les processus et libère les mémoires partagées
+        """
+        self.arrays = {} # les vues numpy doivent disparaître avant de fermer les mémoires partagées
+        self.finalizer()
+
+    @staticmethod
+    def release(pool, shms:list):
+        """
+        arrête le pool et supprime les mémoires partagées
+        Args:
+            pool (multiprocessing.Pool): pool de processus
+            shms (list): mémoires partagées à supprimer
+        """
+        pool.terminate()
+        pool.join()
+        for shm in shms:
+            try:
+                shm.close()
+            except BufferError:
+                pass # une vue numpy existe encore, la mémoire sera libérée avec elle
+            shm.unlink()
@@ -1,32 +1,41 @@
+from array import array
+
+
 class Pile:
-    """ classe simulant une Pile (FIFO)
+    """ classe simulant une Pile (LIFO)
     permettant de stocker les celulles déjà visitées
+    les éléments sont des entiers rangés dans un tableau préalloué (pas de réallocation à chaque ajout)
     """
-    def __init__(self):
+    def __init__(self, capacity:int=0):
         """
         constructeur de Pile
-        initialise une liste vide
+        initialise une pile vide
+
+        Args:
+            capacity (int): nombre d'éléments préalloués (la pile s'agrandit si besoin)
         """
         self.size = 0
-        self.elem = []
+        self.elem = array("q", bytes(8 * capacity))
 
-    def add(self, item):
+    def add(self, item:int):
         """ ajoute un element à la pile
 
         Args:
-            item (tuple:(int,int)): coordonnée de la cellule à empiler
+            item (int): indice de la cellule à empiler
         """
+        if self.size == len(self.elem): # pile pleine, on double sa capacité
+            self.elem.extend(array("q", bytes(8 * max(1, len(self.elem)))))
+        self.elem[self.size] = item
         self.size += 1
-        self.elem.append(item)
 
     def depile(self):
-        """ renvoie le premier élément de la pile
+        """ renvoie le dernier élément ajouté à la pile
 
         Returns:
-            tuple(int,int): coordonnée de la cellule
+            int: indice de la cellule
         """
         self.size -= 1
-        return self.elem.pop()
+        return self.elem[self.size]
     
     def get_size(self):
         """renvoie la longueur de la pile
@@ -34,4 +43,4 @@ class Pile:
         Returns:
             int: nombre de cellule présebt dans la pile
         """
-        return self.size
\ No newline at end of file
+        return self.size
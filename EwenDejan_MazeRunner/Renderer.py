@@ -0,0 +1,247 @@
+import math
+import os
+import struct
+import tempfile
+import zlib
+import numpy as np
+from matplotlib import colormaps
+from Maze import PATH_COLOR, PHEROMONE_COLOR, TILE_ROWS
+
+
+# couleurs par défaut des calques
+RUNNER_COLOR = [0, 255, 0]
+START_COLOR = [0, 0, 255]
+GOAL_COLOR = [255, 0, 0]
+# palette de la carte de chaleur des visites (256 couleurs)
+HEATMAP_COLORS = (colormaps["inferno"](np.linspace(0.15, 1, 256))[:, :3] * 255).astype(np.uint8)
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+class Renderer:
+    """
+    Classe construisant l'image d'un labyrinthe sans boucle par cellule et sans affichage :
+    le labyrinthe, puis des calques (chemins de runners, cellules, carte de chaleur des visites) sont coloriés
+    par indexation numpy, bande de lignes par bande de lignes. L'image peut être réduite (moyenne par blocs)
+    pour les très grands labyrinthes et écrite en PNG bande par bande, sans jamais construire l'image entière.
+    """
+    def __init__(self, maze, band_rows:int=TILE_ROWS):
+        """ constructeur de Renderer
+        Args:
+            maze (Maze): labyrinthe à dessiner
+            band_rows (int): nombre de lignes du labyrinthe dessinées à la fois
+        """
+        self.maze = maze
+        self.band_rows = band_rows
+        self.layers = [] # (cellules triées par ligne, couleur(s)) dans l'ordre de dessin
+        self.heat = None # nombre de visites de chaque cellule (None sans carte de chaleur)
+        self.heat_top = 1.0 # log(1 + nombre maximal de visites)
+        self.heat_alpha = 0.8
+
+    def add_cells(self, cells, color):
+        """
+        ajoute un calque de cellules d'une même couleur ou d'une couleur par cellule
+        Args:
+            cells (np.ndarray): coordonnées (k x 2) des cellules
+            color (list ou np.ndarray): couleur RGB, ou matrice (k x 3) d'une couleur par cellule
+        """
+        cells = np.asarray(cells, dtype=np.int64).reshape(-1, 2)
+        color = np.asarray(color, dtype=np.uint8)
+        order = np.argsort(cells[:, 0], kind="stable") # tri par ligne pour retrouver vite les cellules d'une bande
+        if color.ndim == 2:
+            color = color[order]
+        self.layers.append((cells[order], color))
+
+    def add_path(self, start:tuple, path:list, color=RUNNER_COLOR):
+        """
+        ajoute un calque avec les cellules d'un chemin
+        Args:
+            start (tuple (int, int)): départ du chemin
+            path (list): directions du chemin (-1 pour un mouvement dans un mur)
+            color (list): couleur RGB du chemin
+        """
+        self.add_cells(self.maze.path_cells(start, path), color)
+
+    def add_runner(self, runner, color=RUNNER_COLOR):
+        """
+        ajoute un calque avec le chemin parcouru par un runner
+        Args:
+            runner (Runner): runner à dessiner
+            color (list): couleur RGB du chemin
+        """
+        self.add_path(runner.get_start(), runner.get_path(), color)
+
+    def add_heatmap(self, counts:np.ndarray, alpha:float=0.8):
+        """
+        ajoute une carte de chaleur (dessinée sous les autres calques, échelle logarithmique)
+        Args:
+            counts (np.ndarray): matrice (size x size) du nombre de visites de chaque cellule
+            alpha (float): opacité de la carte de chaleur sur les cellules visitées
+        """
+        self.heat = counts
+        self.heat_top = math.log1p(max(int(np.max(counts)), 1))
+        self.heat_alpha = alpha
+
+    def add_endpoints(self):
+        """
+        ajoute un calque avec l'arrivée (en rouge) et le départ (en bleu), dessinés par-dessus les chemins
+        """
+        self.add_cells([self.maze.get_goal()], GOAL_COLOR)
+        self.add_cells([self.maze.get_start()], START_COLOR)
+
+    def visit_counts(self, runners:list):
+        """
+        compte les visites de chaque cellule par les runners déjà évalués (départ compris)
+        les runners pas encore évalués (enfants de la dernière reproduction, sans chemin) sont ignorés
+        Args:
+            runners (list): runners
+        Returns:
+            np.ndarray: matrice (size x size) du nombre de visites
+        """
+        n = self.maze.get_size()
+        flat = []
+        for runner in runners:
+            if not runner.get_path():
+                if runner.get_length():
+                    raise ValueError("le chemin de ce runner n'a pas été gardé (voir Runner.set_length)")
+                continue # pas encore évalué
+            cells = self.maze.path_cells(runner.get_start(), runner.get_path())
+            flat.append(cells[:, 0]*n + cells[:, 1])
+        counts = np.bincount(np.concatenate(flat), minlength=n*n) if flat else np.zeros(n*n, dtype=np.int64)
+        return counts.reshape(n, n)
+
+    def draw_layers(self, with_colors:bool=True):
+        """
+        renvoie les calques à dessiner, dans l'ordre
+        Args:
+            with_colors (bool): True pour commencer par les couleurs posées par Maze.change_color
+        Returns:
+            list: (cellules triées par ligne, couleur(s)) de chaque calque
+        """
+        colors = self.maze.colors
+        if not with_colors or not colors:
+            return self.layers
+        cells = np.array(list(colors.keys()), dtype=np.int64)
+        values = np.array(list(colors.values()), dtype=np.uint8)
+        order = np.argsort(cells[:, 0], kind="stable")
+        return [(cells[order], values[order])] + self.layers
+
+    def render_rows(self, row:int, end:int, layers:list):
+        """
+        dessine les lignes [row, end[ du labyrinthe en pleine résolution
+        Args:
+            row (int): première ligne
+            end (int): ligne suivant la dernière
+            layers (list): calques à dessiner (voir draw_layers)
+        Returns:
+            np.ndarray: image (end-row, size, 3) des lignes
+        """
+        maze = self.maze
+        grid = maze.grid[row:end]
+        carved = grid if maze.empty_grid is None else maze.empty_grid[row:end]
+        image = np.zeros((end-row, maze.get_size(), 3), dtype=np.uint8)
+        image[carved] = PATH_COLOR
+        image[carved & ~grid] = PHEROMONE_COLOR
+        if self.heat is not None:
+            heat = np.asarray(self.heat[row:end])
+            visited = heat > 0
+            if visited.any():
+                # échelle logarithmique : une cellule visitée une fois reste visible à côté des plus visitées
+                levels = (np.log1p(heat[visited]) / self.heat_top * 255).astype(np.int64)
+                colors = HEATMAP_COLORS[np.minimum(levels, 255)].astype(np.float32)
+                image[visited] = (self.heat_alpha * colors + (1 - self.heat_alpha) * image[visited]).astype(np.uint8)
+        for cells, color in layers:
+            low, high = np.searchsorted(cells[:, 0], [row, end])
+            band = cells[low:high]
+            image[band[:, 0] - row, band[:, 1]] = color if color.ndim == 1 else color[low:high]
+        return image
+
+    def bands(self, max_size:int=None, with_colors:bool=True):
+        """
+        dessine le labyrinthe bande par bande, réduit si besoin (moyenne des blocs de factor x factor cellules)
+        Args:
+            max_size (int): nombre maximal de pixels par côté (None pour la pleine résolution)
+            with_colors (bool): True pour ajouter les couleurs posées par Maze.change_color
+        Returns:
+            generator: images (h, w, 3) successives, de haut en bas
+        """
+        n = self.maze.get_size()
+        factor = 1 if max_size is None else max(1, -(-n // max_size))
+        band_rows = max(factor, self.band_rows // factor * factor) # un nombre entier de blocs par bande
+        layers = self.draw_layers(with_colors)
+        for row in range(0, n, band_rows):
+            end = min(row+band_rows, n)
+            image = self.render_rows(row, end, layers)
+            if factor > 1:
+                # les bords sont complétés en répétant la dernière ligne / colonne
+                image = np.pad(image, ((0, -(end-row) % factor), (0, -n % factor), (0, 0)), mode="edge")
+                h, w = image.shape[0] // factor, image.shape[1] // factor
+                # somme entière des blocs, une ligne puis une colonne de chaque bloc à la fois
+                # (additions de tranches contiguës, bien plus rapides qu'une moyenne sur des axes non contigus)
+                rows = np.zeros((h, image.shape[1], 3), dtype=np.uint32)
+                for k in range(factor):
+                    rows += image[k::factor]
+                rows = rows.reshape(h, w, factor, 3)
+                sums = rows[:, :, 0].copy()
+                for k in range(1, factor):
+                    sums += rows[:, :, k]
+                image = ((sums + factor*factor // 2) // (factor*factor)).astype(np.uint8) # arrondi au plus proche
+            yield image
+
+    def render(self, max_size:int=None, with_colors:bool=True):
+        """
+        construit l'image complète du labyrinthe et de ses calques
+        Args:
+            max_size (int): nombre maximal de pixels par côté (None pour la pleine résolution)
+            with_colors (bool): True pour ajouter les couleurs posées par Maze.change_color
+        Returns:
+            np.ndarray: image RGB
+        """
+        return np.concatenate(list(self.bands(max_size, with_colors)))
+
+    def save_png(self, path:str, max_size:int=None, with_colors:bool=True, compression:int=6):
+        """
+        écrit l'image dans un fichier PNG bande par bande (sans affichage et sans construire l'image entière)
+        le fichier n'apparaît qu'une fois complet
+        Args:
+            path (str): chemin du fichier
+            max_size (int): nombre maximal de pixels par côté (None pour la pleine résolution)
+            with_colors (bool): True pour ajouter les couleurs posées par Maze.change_color
+            compression (int): niveau de compression zlib (0 à 9)
+        """
+        n = self.maze.get_size()
+        side = n if max_size is None else -(-n // max(1, -(-n // max_size)))
+        # fichier temporaire au nom unique : deux rendus vers le même fichier ne se gênent pas
+        with tempfile.NamedTemporaryFile("wb", dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp", delete=False) as file:
+            try:
+                file.write(PNG_SIGNATURE)
+                # largeur, hauteur, 8 bits par canal, RGB, compression, filtre et entrelacement par défaut
+                Renderer.write_chunk(file, b"IHDR", struct.pack(">IIBBBBB", side, side, 8, 2, 0, 0, 0))
+                compressor = zlib.compressobj(compression)
+                for image in self.bands(max_size, with_colors):
+                    # chaque ligne commence par son type de filtre (0 : aucun)
+                    rows = np.zeros((image.shape[0], 1 + 3*image.shape[1]), dtype=np.uint8)
+                    rows[:, 1:] = image.reshape(image.shape[0], -1)
+                    data = compressor.compress(rows.tobytes())
+                    if data:
+                        Renderer.write_chunk(file, b"IDAT", data)
+                Renderer.write_chunk(file, b"IDAT", compressor.flush())
+                Renderer.write_chunk(file, b"IEND", b"")
+            except BaseException:
+                file.close()
+                os.remove(file.name)
+                raise
+        os.replace(file.name, path) # le fichier n'apparaît qu'une fois complet
+
+    @staticmethod
+    def write_chunk(file, kind:bytes, data:bytes):
+        """
+        écrit un bloc PNG (longueur, type, données, CRC)
+        Args:
+            file (file): fichier PNG ouvert en écriture binaire
+            kind (bytes): type du bloc (4 octets)
+            data (bytes): données du bloc
+        """
+        file.write(struct.pack(">I", len(data)))
+        file.write(kind)
+        file.write(data)
+        file.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(kind))))
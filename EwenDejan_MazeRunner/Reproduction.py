@@ -0,0 +1,88 @@
+import numpy as np
+
+
+# opérateurs de croisement disponibles
+CROSSOVER_STRATEGIES = ("one_point", "two_point", "uniform")
+
+class Reproduction:
+    """
+    Classe regroupant les opérateurs de croisement et de mutation.
+    Tous les tirages d'une génération sont faits d'un coup pour tous les enfants :
+    les opérateurs travaillent sur les longueurs des ADN des parents et renvoient des masques,
+    la copie des gènes est faite par GeneticAlgo sur la matrice du GenomeStore.
+    """
+    def __init__(self, strategy:str="one_point", seed:int=None):
+        """ constructeur de Reproduction
+        Args:
+            strategy (str): "one_point" (un point de croisement), "two_point" (deux points)
+                ou "uniform" (chaque gène tiré au hasard chez l'un des parents)
+            seed (int): graine du générateur aléatoire (None pour une graine aléatoire)
+        """
+        if strategy not in CROSSOVER_STRATEGIES:
+            raise ValueError(f"opérateur de croisement inconnu : {strategy}")
+        self.strategy = strategy
+        self.rng = np.random.default_rng(seed)
+
+    def pairs(self, n_parents:int, n_children:int):
+        """
+        tire les deux parents de chaque enfant
+        Args:
+            n_parents (int): nombre de parents possibles
+            n_children (int): nombre d'enfants
+        Returns:
+            tuple (np.ndarray, np.ndarray): indices du premier et du second parent de chaque enfant
+        """
+        first, second = self.rng.integers(0, n_parents, size=(2, n_children))
+        return first, second
+
+    def crossover(self, lengths1:np.ndarray, lengths2:np.ndarray):
+        """
+        tire les croisements de tous les enfants selon l'opérateur choisi
+        (les ADN des parents peuvent avoir des longueurs différentes : tirés à la demande, raccourcis au but)
+        Args:
+            lengths1 (np.ndarray): longueur de l'ADN du premier parent de chaque enfant
+            lengths2 (np.ndarray): longueur de l'ADN du second parent de chaque enfant
+        Returns:
+            tuple: (mask, lengths, needs1, needs2)
+                mask (np.ndarray): matrice (n_children x lengths.max()), True pour un gène du premier parent
+                lengths (np.ndarray): longueur de l'ADN de chaque enfant
+                needs1, needs2 (np.ndarray): nombre de gènes que chaque parent doit avoir tirés
+        """
+        n = len(lengths1)
+        dna_len = np.maximum(np.maximum(lengths1, lengths2), 2)
+        if self.strategy == "one_point":
+            # début du premier parent, fin du second
+            cut = self.rng.integers(1, dna_len)
+            lengths = np.maximum(cut, lengths2)
+            needs1, needs2 = cut, np.zeros(n, dtype=np.int64)
+            low, high = cut, lengths
+        elif self.strategy == "two_point":
+            # début et fin du premier parent, milieu du second
+            low, high = np.sort(self.rng.integers(1, dna_len, size=(2, n)), axis=0)
+            lengths = np.maximum(np.maximum(lengths1, low), high)
+            needs1, needs2 = np.maximum(lengths1, low), high
+        else:
+            lengths = dna_len
+            needs1, needs2 = dna_len, dna_len
+        width = int(lengths.max()) if n else 0
+        columns = np.arange(width)
+        if self.strategy == "uniform":
+            mask = self.rng.integers(0, 2, size=(n, width), dtype=np.bool_)
+        else:
+            mask = (columns < low[:, None]) | (columns >= high[:, None])
+        return mask, lengths, needs1, needs2
+
+    def mutation(self, lengths:np.ndarray, rate:float):
+        """
+        tire les mutations de tous les enfants (chaque gène mute avec une probabilité rate)
+        Args:
+            lengths (np.ndarray): longueur de l'ADN de chaque enfant
+            rate (float): taux de mutation
+        Returns:
+            tuple (np.ndarray, np.ndarray, np.ndarray): enfant, position et nouveau gène de chaque mutation
+                (triées par enfant puis par position)
+        """
+        width = int(lengths.max()) if len(lengths) else 0
+        mask = (self.rng.random((len(lengths), width)) < rate) & (np.arange(width) < lengths[:, None])
+        rows, columns = np.nonzero(mask)
+        return rows, columns, self.rng.integers(0, 8, len(rows), dtype=np.uint8)
@@ -1,51 +1,154 @@
 import random as rd
+import numpy as np
+from GenomeStore import GenomeStore
 
 
+# nombre de gènes tirés d'un coup quand l'ADN doit être prolongé
+GENE_BLOCK = 256
+
 class Runner:
     """
     Classe représentant un individu tentant de résoudre le labyrinthe.
+    Son ADN est une ligne d'un GenomeStore (partagé par toute la population de GeneticAlgo).
     """
-    def __init__(self, start:tuple, runner_length:int):
+    __slots__ = ("start", "max_length", "gene_seed", "store", "slot", "path", "length", "fitness",
+                 "last_cell", "reached_goal", "resume_source", "first_changed")
+
+    def __init__(self, start:tuple, runner_length:int, store:GenomeStore=None, gene_seed:int=None):
         """constructeur de runner
-        initialise une suite d'adn aléatoire
+        l'ADN aléatoire n'est pas tiré tout de suite : il est prolongé à la demande (voir extend)
+        jusqu'à runner_length gènes, et raccourci à la partie utilisée quand le but est atteint
 
         Args:
-            start (tuple): _description_
-            runner_length (int): _description_
+            start (tuple): coordonnées du départ
+            runner_length (int): longueur maximale de l'ADN
+            store (GenomeStore): matrice où ranger l'ADN (None pour une matrice propre au runner)
+            gene_seed (int): graine des gènes tirés à la demande (None pour en tirer une avec random)
         """
         self.start = start
-        # ici je fais la différence entre l'ADN du runner (self.dna) et le chemin réellement parcouru (self.path)
+        self.max_length = runner_length
+        self.gene_seed = rd.getrandbits(64) if gene_seed is None else gene_seed # graine des gènes tirés à la demande
+        # ici je fais la différence entre l'ADN du runner (sa ligne du store) et le chemin réellement parcouru (self.path)
         # le but étant de pouvoir tracer le chemin réellement parcouru dans le labyrinthe sans compromettre l'ADN
-        self.dna = [rd.randint(0, 7) for i in range(runner_length)]
+        self.store = store if store is not None else GenomeStore(1, 0, runner_length)
+        self.slot = self.store.allocate()
         self.path = []
+        self.length = 0 # longueur du chemin parcouru
         self.fitness = float('inf') # fitness initiale infinie
         self.last_cell = start # dernière cellule atteinte
         self.reached_goal = False # indique si le but a été atteint
+        # points de reprise de la simulation (chemin, positions, compteurs) de l'ADN dont le runner est issu
+        # et index du premier gène modifié depuis (les gènes avant cet index donnent le même parcours)
+        self.resume_source = None
+        self.first_changed = 0
+
+    def __del__(self):
+        """
+        rend la ligne de l'ADN au store quand le runner disparaît
+        """
+        self.store.release(self.slot)
 
-    def journey(self, maze):
+    def journey(self, maze, goal:tuple=None):
         """
         Fait parcourir le labyrinthe au runner selon son ADN en prenant en compte les obstacles.
         Args:
             maze (Maze): labyrinthe parcouru
+            goal (tuple (int, int)): arrivée visée (None pour l'arrivée du labyrinthe)
         """
-        current_x, current_y = self.start[0], self.start[1]
+        goal = maze.get_goal() if goal is None else goal
+        # index des mouvements légaux aplati : une seule lecture par pas (les bords y sont déjà fermés)
+        n = maze.get_size()
+        legal = memoryview(np.ascontiguousarray(maze.get_moves()).reshape(-1))
+        offsets = [move[0]*n + move[1] for move in maze.get_cardinal().values()]
+        cell = self.start[0]*n + self.start[1]
+        goal_cell = goal[0]*n + goal[1]
         self.path = []
-        for direction in self.dna: # pour chaque mouvement dans l'ADN
-            move = maze.get_cardinal()[direction]
-            # on vérifie si le mouvement est valide (dans le labyrinthe et pas un mur)
-            if maze.is_valid((current_x, current_y), move):
-                # si oui, on effectue le mouvement et on l'ajoute au chemin parcouru
-                current_x += move[0]
-                current_y += move[1]
-                self.path.append(direction)
-                self.last_cell = (current_x, current_y)
-            else:
-                # sinon, on reste sur place et on ajoute -1 au chemin parcouru
-                self.path.append(-1) 
-            if (current_x, current_y) == maze.get_goal():
-                # si le but est atteint, on arrête le parcours
-                self.reached_goal = True
-                break
+        # on repart de zéro (le labyrinthe a pu changer depuis le dernier parcours)
+        self.reached_goal = False
+        while not self.reached_goal and len(self.path) < self.max_length:
+            # l'ADN est prolongé quand le runner a lu tous ses gènes
+            step = len(self.path)
+            if step == self.store.get_length(self.slot):
+                self.extend(step + GENE_BLOCK)
+            for direction in self.row_view()[step:].tolist(): # pour chaque mouvement dans l'ADN
+                # on vérifie si le mouvement est valide (dans le labyrinthe et pas un mur)
+                if legal[cell] >> direction & 1:
+                    # si oui, on effectue le mouvement et on l'ajoute au chemin parcouru
+                    cell += offsets[direction]
+                    self.path.append(direction)
+                else:
+                    # sinon, on reste sur place et on ajoute -1 au chemin parcouru
+                    self.path.append(-1)
+                if cell == goal_cell:
+                    # si le but est atteint, on arrête le parcours
+                    self.reached_goal = True
+                    break
+        legal.release()
+        self.last_cell = divmod(cell, n) # dernière cellule atteinte (le départ si le runner n'a pas bougé)
+        self.length = len(self.path)
+
+    def extend(self, length:int):
+        """
+        prolonge l'ADN jusqu'à length gènes (sans dépasser la longueur maximale)
+        chaque gène ne dépend que de gene_seed et de sa position : un runner obtient les mêmes gènes
+        qu'ils soient tirés au fur et à mesure du parcours ou tous d'un coup
+        Args:
+            length (int): longueur voulue de l'ADN
+        """
+        length = min(length, self.max_length)
+        store = self.store
+        current = store.get_length(self.slot)
+        if current >= length:
+            return
+        store.widen(length)
+        store.get_genes()[self.slot, current:length] = Runner.draw_genes(self.gene_seed, current, length)
+        store.set_length(self.slot, length)
+
+    @staticmethod
+    def draw_genes(gene_seed:int, start:int, end:int):
+        """
+        tire les gènes des positions [start, end[ d'un ADN (par blocs de GENE_BLOCK gènes)
+        chaque bloc ne dépend que de la graine et de son numéro : les processus de ParallelEvaluator
+        tirent les mêmes gènes que Runner.extend
+        Args:
+            gene_seed (int): graine des gènes
+            start (int): première position
+            end (int): position suivant la dernière
+        Returns:
+            np.ndarray: gènes des positions start à end-1
+        """
+        first_block = start // GENE_BLOCK
+        genes = np.concatenate([np.random.default_rng([gene_seed, block]).integers(0, 8, GENE_BLOCK, dtype=np.int8)
+                                for block in range(first_block, (end - 1) // GENE_BLOCK + 1)])
+        offset = start - first_block * GENE_BLOCK
+        return genes[offset:offset + end - start]
+
+    def truncate(self, length:int):
+        """
+        raccourcit l'ADN à ses length premiers gènes (les gènes suivants ne sont pas lus, le but étant atteint avant)
+        Args:
+            length (int): nombre de gènes gardés
+        """
+        self.store.set_length(self.slot, min(length, self.store.get_length(self.slot)))
+
+    def copy(self):
+        """
+        renvoie une copie du runner (même ADN, utile quand un runner est sélectionné plusieurs fois)
+        l'ADN de la copie est une autre ligne du même store
+
+        Returns:
+            Runner: copie du runner
+        """
+        clone = Runner(self.start, self.max_length, self.store, self.gene_seed)
+        clone.set_dna(self.row_view())
+        clone.path = list(self.path)
+        clone.length = self.length
+        clone.fitness = self.fitness
+        clone.last_cell = self.last_cell
+        clone.reached_goal = self.reached_goal
+        clone.resume_source = self.resume_source
+        clone.first_changed = self.first_changed
+        return clone
 
     def mutate(self, mutation:int, index:int):
         """
@@ -54,7 +157,37 @@ class Runner:
             mutation (int): nouvelle direction pour l'ADN à l'index donné
             index (int): index dans l'ADN à muter
         """
-        self.dna[index] = mutation
+        self.store.get_genes()[self.slot, index] = mutation
+        self.first_changed = min(self.first_changed, index)
+
+    def mark_changed(self, index:int):
+        """
+        signale qu'un gène a été modifié directement dans le store (mutations de toute la population d'un coup)
+        Args:
+            index (int): index du gène modifié
+        """
+        self.first_changed = min(self.first_changed, index)
+
+    def inherit(self, parent, cut:int):
+        """
+        reprend les points de reprise d'un parent dont les cut premiers gènes sont identiques
+        Args:
+            parent (Runner): parent dont l'ADN commence comme celui du runner
+            cut (int): nombre de gènes en commun avec le parent
+        """
+        self.resume_source = parent.get_resume_source()
+        self.first_changed = cut
+
+    def set_checkpoints(self, path:list, discovered, checkpoints:list):
+        """
+        enregistre les points de reprise du dernier parcours (l'ADN n'a pas changé depuis)
+        Args:
+            path (list): chemin parcouru
+            discovered (array): cellules découvertes dans l'ordre (indices dans la grille aplatie)
+            checkpoints (list): (nombre de gènes lus, coups dans les murs, découvertes, position) à chaque point de reprise
+        """
+        self.resume_source = (path, discovered, checkpoints)
+        self.first_changed = self.store.get_length(self.slot)
 
     def set_fitness(self, fitness:int):
         """
@@ -64,13 +197,65 @@ class Runner:
         """
         self.fitness = fitness
     
-    def set_dna(self, dna:list):
+    def set_dna(self, dna):
         """
         définit l'ADN du runner, (utile pour la reproduction)
+        (la longueur maximale est augmentée si l'ADN est plus long)
+        Args:
+            dna (list ou np.ndarray): valeur de l'ADN du runner (copiée dans le store)
+        """
+        length = len(dna)
+        self.store.widen(length)
+        self.store.get_genes()[self.slot, :length] = dna
+        self.store.set_length(self.slot, length)
+        self.max_length = max(self.max_length, length)
+        self.resume_source = None
+        self.first_changed = 0
+
+    def splice(self, parent1, parent2, cut:int):
+        """
+        définit l'ADN du runner comme les cut premiers gènes de parent1 suivis des gènes de parent2 après cut
+        (copie de tranches, utile pour le croisement)
+        Args:
+            parent1 (Runner): parent du début de l'ADN
+            parent2 (Runner): parent de la fin de l'ADN
+            cut (int): index du croisement
+        """
+        head = parent1.row_view()[:cut]
+        tail = parent2.row_view()[cut:]
+        self.set_dna(head) # head est plus court que cut si parent1 n'a pas autant de gènes
+        length = len(head) + len(tail)
+        self.store.widen(length)
+        self.store.get_genes()[self.slot, len(head):length] = tail
+        self.store.set_length(self.slot, length)
+        self.max_length = max(self.max_length, length)
+
+    def set_path(self, path:list):
+        """
+        définit le chemin parcouru (utile pour la simulation de toute la population)
+        Args:
+            path (list): chemin parcouru
+        """
+        self.path = path
+        self.length = len(path)
+
+    def set_length(self, length:int):
+        """
+        définit la longueur du chemin parcouru sans garder le chemin
+        (évaluation parallèle, seul le chemin du meilleur runner est reconstruit)
+        Args:
+            length (int): longueur du chemin parcouru
+        """
+        self.path = []
+        self.length = length
+
+    def set_last_cell(self, last_cell:tuple):
+        """
+        définit la dernière cellule atteinte
         Args:
-            dna (list): valeur de l'ADN du runner
+            last_cell (tuple (int, int)): coordonnées de la dernière cellule atteinte
         """
-        self.dna = dna
+        self.last_cell = last_cell
 
     def set_reached_goal(self, reached_goal:bool):
         """
@@ -123,7 +308,7 @@ class Runner:
         Returns:
             int: longueur du chemin parcouru
         """
-        return len(self.path)
+        return self.length
     
     def get_path(self):
         """
@@ -134,14 +319,96 @@ class Runner:
         """
         return self.path
     
+    def get_resume_source(self):
+        """
+        renvoie les points de reprise de la simulation (None s'il n'y en a pas)
+
+        Returns:
+            tuple: (chemin, cellules découvertes, points de reprise)
+        """
+        return self.resume_source
+
+    def get_first_changed(self):
+        """
+        renvoie l'index du premier gène modifié depuis les points de reprise
+
+        Returns:
+            int: index du premier gène modifié
+        """
+        return self.first_changed
+
+    def get_max_length(self):
+        """
+        renvoie la longueur maximale de l'ADN
+
+        Returns:
+            int: longueur maximale de l'ADN
+        """
+        return self.max_length
+
+    def get_gene_seed(self):
+        """
+        renvoie la graine des gènes tirés à la demande
+
+        Returns:
+            int: graine des gènes
+        """
+        return self.gene_seed
+
+    def set_gene_seed(self, gene_seed:int):
+        """
+        définit la graine des gènes tirés à la demande (restauration d'une sauvegarde)
+        Args:
+            gene_seed (int): graine des gènes
+        """
+        self.gene_seed = gene_seed
+
     def get_dna(self):
         """
-        renvoie l'ADN du runner
+        renvoie l'ADN du runner (les gènes déjà tirés, voir extend)
+
+        Returns:
+            np.ndarray: copie de l'ADN du runner
+        """
+        return self.store.row(self.slot).copy()
+
+    def row_view(self):
+        """
+        renvoie l'ADN du runner sans copie, pour une lecture immédiate
+        la vue n'est plus valable après un agrandissement du store (grow, widen)
+        ou quand le runner disparaît (sa ligne est rendue au store)
+
+        Returns:
+            np.ndarray: vue sur la ligne du store
+        """
+        return self.store.row(self.slot)
+
+    def get_dna_length(self):
+        """
+        renvoie le nombre de gènes déjà tirés
+
+        Returns:
+            int: longueur de l'ADN
+        """
+        return self.store.get_length(self.slot)
+
+    def get_store(self):
+        """
+        renvoie le store où est rangé l'ADN
+
+        Returns:
+            GenomeStore: store de l'ADN
+        """
+        return self.store
+
+    def get_slot(self):
+        """
+        renvoie le numéro de la ligne de l'ADN dans le store
 
         Returns:
-            list: ADN du runner
+            int: numéro de la ligne
         """
-        return self.dna
+        return self.slot
     
     def __str__(self):
         """
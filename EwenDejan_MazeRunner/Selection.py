@@ -0,0 +1,86 @@
+import numpy as np
+
+
+# stratégies de sélection disponibles
+SELECTION_STRATEGIES = ("truncation", "tournament", "roulette")
+
+class Selection:
+    """
+    Classe regroupant les stratégies de sélection des runners.
+    Toutes les stratégies travaillent sur un tableau de fitness (plus la fitness est petite, meilleur est le runner)
+    et renvoient les indices des runners sélectionnés, sans comparer les runners deux à deux.
+    """
+    def __init__(self, strategy:str="truncation", tournament_size:int=3, seed:int=None):
+        """ constructeur de Selection
+        Args:
+            strategy (str): "truncation" (les k meilleurs), "tournament" (tournois) ou "roulette" (roulette sur les rangs)
+            tournament_size (int): nombre de runners par tournoi
+            seed (int): graine du générateur aléatoire (None pour une graine aléatoire)
+        """
+        if strategy not in SELECTION_STRATEGIES:
+            raise ValueError(f"stratégie de sélection inconnue : {strategy}")
+        self.strategy = strategy
+        self.tournament_size = tournament_size
+        self.rng = np.random.default_rng(seed)
+
+    def select(self, fitness:np.ndarray, k:int):
+        """
+        sélectionne k runners selon la stratégie choisie
+        Args:
+            fitness (np.ndarray): fitness de chaque runner
+            k (int): nombre de runners à sélectionner
+        Returns:
+            np.ndarray: indices des runners sélectionnés, du meilleur au moins bon
+                (un même indice peut apparaître plusieurs fois sauf pour "truncation")
+        """
+        fitness = np.asarray(fitness)
+        if self.strategy == "truncation":
+            chosen = self.truncation(fitness, k)
+        elif self.strategy == "tournament":
+            chosen = self.tournament(fitness, k)
+        else:
+            chosen = self.roulette(fitness, k)
+        # on range les sélectionnés du meilleur au moins bon
+        return chosen[np.argsort(fitness[chosen], kind="stable")]
+
+    def truncation(self, fitness:np.ndarray, k:int):
+        """
+        garde les k meilleurs runners (top-k en O(n) avec argpartition)
+        Args:
+            fitness (np.ndarray): fitness de chaque runner
+            k (int): nombre de runners à sélectionner
+        Returns:
+            np.ndarray: indices des k meilleurs runners (dans le désordre)
+        """
+        if k >= len(fitness):
+            return np.arange(len(fitness))
+        return np.argpartition(fitness, k - 1)[:k]
+
+    def tournament(self, fitness:np.ndarray, k:int):
+        """
+        organise k tournois entre runners tirés au hasard, le meilleur de chaque tournoi est sélectionné
+        Args:
+            fitness (np.ndarray): fitness de chaque runner
+            k (int): nombre de runners à sélectionner
+        Returns:
+            np.ndarray: indices des vainqueurs des tournois
+        """
+        contenders = self.rng.integers(0, len(fitness), size=(k, self.tournament_size))
+        winners = np.argmin(fitness[contenders], axis=1)
+        return contenders[np.arange(k), winners]
+
+    def roulette(self, fitness:np.ndarray, k:int):
+        """
+        roulette sur les rangs : le meilleur runner a un poids n, le suivant n-1, ..., le moins bon 1
+        (on utilise les rangs et pas les fitness car elles peuvent être négatives)
+        Args:
+            fitness (np.ndarray): fitness de chaque runner
+            k (int): nombre de runners à sélectionner
+        Returns:
+            np.ndarray: indices des runners tirés
+        """
+        n = len(fitness)
+        ranks = np.empty(n, dtype=np.int64)
+        ranks[np.argsort(fitness, kind="stable")] = np.arange(n)
+        weights = (n - ranks).astype(np.float64)
+        return self.rng.choice(n, size=k, p=weights / weights.sum())
@@ -0,0 +1,215 @@
+from Maze import Maze
+from Runner import Runner
+from GeneticAlgo import GeneticAlgo
+import argparse
+import copy
+import json
+import os
+import platform
+import random as rd
+import statistics
+import sys
+import time
+import numpy as np
+
+
+# paramètres de l'algorithme génétique utilisés par les mesures (les mêmes que test_final.py)
+MUTATION_RATE = 0.1
+SELECTION_RATE = 0.5
+
+# écart relatif au-delà duquel une mesure est considérée comme une régression
+DEFAULT_THRESHOLD = 0.15
+
+
+def make_maze(size:int, seed:int):
+    """
+    génère et résout un labyrinthe (toujours le même pour une taille et une graine)
+    Args:
+        size (int): taille du labyrinthe
+        seed (int): graine du labyrinthe
+    Returns:
+        Maze: le labyrinthe résolu
+    """
+    maze = Maze(size, seed=seed)
+    maze.generate()
+    maze.solve_from_random_coordonnates()
+    return maze
+
+def measure(function, setup, repeat:int):
+    """
+    mesure le temps d'exécution d'une fonction
+    Args:
+        function (function): fonction mesurée, appelée avec le résultat de setup
+        setup (function): préparation (non mesurée) appelée avant chaque exécution
+        repeat (int): nombre d'exécutions
+    Returns:
+        list: durée de chaque exécution (en secondes)
+    """
+    times = []
+    for k in range(repeat):
+        state = setup()
+        start = time.perf_counter()
+        function(state)
+        times.append(time.perf_counter() - start)
+    return times
+
+def make_population(maze, pop_size:int, runner_length:int, seed:int):
+    """
+    crée une population de runners à l'ADN aléatoire (toujours le même pour une graine)
+    Args:
+        maze (Maze): labyrinthe parcouru
+        pop_size (int): taille de la population
+        runner_length (int): longueur des runners
+        seed (int): graine de l'ADN
+    Returns:
+        list: les runners
+    """
+    rd.seed(seed)
+    return [Runner(maze.get_start(), runner_length) for k in range(pop_size)]
+
+def make_ga(maze, pop_size:int, runner_length:int, generations:int, evaluation:str, seed:int):
+    """
+    crée un algorithme génétique sur une copie du labyrinthe (les phéromones modifient le labyrinthe)
+    Args:
+        maze (Maze): labyrinthe utilisé (copié)
+        pop_size (int): taille de la population
+        runner_length (int): longueur des runners
+        generations (int): nombre de générations
+        evaluation (str): mode d'évaluation
+        seed (int): graine de la population et de l'évolution
+    Returns:
+        GeneticAlgo: l'algorithme génétique
+    """
+    rd.seed(seed)
+    np.random.seed(seed)
+    return GeneticAlgo(copy.deepcopy(maze), runner_length, pop_size, generations, MUTATION_RATE, SELECTION_RATE, evaluation=evaluation)
+
+def run_suite(sizes:list, pop_sizes:list, evaluations:list, repeat:int, generations:int, length_factor:int, seed:int):
+    """
+    lance toutes les mesures
+    Args:
+        sizes (list): tailles de labyrinthe
+        pop_sizes (list): tailles de population
+        evaluations (list): modes d'évaluation de GeneticAlgo mesurés pour run_generation et evolution
+        repeat (int): nombre d'exécutions de chaque mesure
+        generations (int): nombre de générations de la mesure evolution
+        length_factor (int): longueur des runners = length_factor * taille du labyrinthe
+        seed (int): graine de toutes les mesures
+    Returns:
+        list: un dict par mesure (nom, paramètres, durées)
+    """
+    results = []
+    def record(name, times, **params):
+        result = {"name": name, **params, "times": times, "best": min(times), "median": statistics.median(times)}
+        results.append(result)
+        print(f"{key(result):60s} median = {result['median']*1000:10.2f} ms   best = {result['best']*1000:10.2f} ms")
+
+    for size in sizes:
+        record("Maze.generate", measure(lambda maze: maze.generate(), lambda: Maze(size, seed=seed), repeat), size=size)
+        maze = make_maze(size, seed)
+        record("Maze.dijkstra", measure(lambda maze: maze.dijkstra(), lambda: maze, repeat), size=size)
+        record("Maze.solve", measure(lambda maze: maze.solve(maze.start[0], maze.start[1]), lambda: maze, repeat), size=size)
+        runner_length = length_factor * size
+        for pop_size in pop_sizes:
+            def journeys(population):
+                for runner in population:
+                    runner.journey(maze)
+            record("Runner.journey", measure(journeys, lambda: make_population(maze, pop_size, runner_length, seed), repeat),
+                   size=size, pop_size=pop_size)
+            def fitnesses(ga):
+                for runner in ga.population:
+                    ga.fitness(runner)
+            def ga_after_journeys():
+                ga = make_ga(maze, pop_size, runner_length, 1, "sequential", seed)
+                for runner in ga.population:
+                    runner.journey(ga.maze)
+                return ga
+            record("GeneticAlgo.fitness", measure(fitnesses, ga_after_journeys, repeat), size=size, pop_size=pop_size)
+            for evaluation in evaluations:
+                record("GeneticAlgo.run_generation",
+                       measure(lambda ga: ga.run_generation(), lambda: make_ga(maze, pop_size, runner_length, 1, evaluation, seed), repeat),
+                       size=size, pop_size=pop_size, evaluation=evaluation)
+                def evolve(ga):
+                    ga.evolution(resume_interval=generations+1)
+                    ga.close()
+                record("GeneticAlgo.evolution",
+                       measure(evolve, lambda: make_ga(maze, pop_size, runner_length, generations, evaluation, seed), repeat),
+                       size=size, pop_size=pop_size, evaluation=evaluation, generations=generations)
+    return results
+
+def key(result:dict):
+    """
+    identifiant d'une mesure (nom et paramètres), utilisé pour la comparer à la référence
+    Args:
+        result (dict): mesure
+    Returns:
+        str: identifiant de la mesure
+    """
+    params = [f"{name}={result[name]}" for name in ("size", "pop_size", "evaluation", "generations") if name in result]
+    return result["name"] + "[" + ",".join(params) + "]"
+
+def compare(results:list, baseline:list, threshold:float):
+    """
+    compare les mesures à celles d'une référence (sur la médiane)
+    Args:
+        results (list): mesures courantes
+        baseline (list): mesures de référence
+        threshold (float): écart relatif au-delà duquel une mesure est une régression
+    Returns:
+        list: clés des mesures en régression
+    """
+    reference = {key(result): result for result in baseline}
+    regressions = []
+    print("\n--- comparaison avec la référence ---")
+    for result in results:
+        old = reference.get(key(result))
+        if old is None:
+            print(f"{key(result):60s} (pas de référence)")
+            continue
+        ratio = result["median"] / old["median"] if old["median"] > 0 else float("inf")
+        status = "REGRESSION" if ratio > 1 + threshold else ("plus rapide" if ratio < 1 - threshold else "ok")
+        print(f"{key(result):60s} x{ratio:6.2f}  {status}")
+        if status == "REGRESSION":
+            regressions.append(key(result))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="mesures de performance de MazeRunner")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[32, 64, 128], help="tailles de labyrinthe")
+    parser.add_argument("--pops", type=int, nargs="+", default=[50, 200], help="tailles de population")
+    parser.add_argument("--evaluations", nargs="+", default=["sequential", "fused", "batch"], help="modes d'évaluation de GeneticAlgo")
+    parser.add_argument("--repeat", type=int, default=5, help="nombre d'exécutions de chaque mesure")
+    parser.add_argument("--generations", type=int, default=5, help="nombre de générations de la mesure evolution")
+    parser.add_argument("--length-factor", type=int, default=8, help="longueur des runners = facteur * taille du labyrinthe")
+    parser.add_argument("--seed", type=int, default=0, help="graine des labyrinthes et des populations")
+    parser.add_argument("--output", default="benchmark_results.json", help="fichier JSON des résultats")
+    parser.add_argument("--baseline", help="fichier JSON de référence à comparer (résultats d'un lancement précédent)")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="écart relatif toléré avant de signaler une régression")
+    args = parser.parse_args()
+
+    results = run_suite(args.sizes, args.pops, args.evaluations, args.repeat, args.generations, args.length_factor, args.seed)
+    report = {
+        "meta": {
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"\nrésultats écrits dans {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} régression(s)")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
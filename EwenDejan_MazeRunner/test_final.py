@@ -1,5 +1,7 @@
 from Maze import Maze
+from MazeCache import MazeCache
 from GeneticAlgo import GeneticAlgo
+from Renderer import Renderer
 import time
 import matplotlib.pyplot as plt
 import numpy as np
@@ -21,9 +23,9 @@ def display_and_save_mazes(maze, best_runner=None, original_dijkstra_map=None):
 
     # solution optimale
     ax = axs[0, 1]
-    maze_sol = maze.empty_maze.copy()
     m_temp = Maze(maze.size)
-    m_temp.maze = maze_sol
+    m_temp.grid = maze.empty_grid.copy()
+    m_temp.colors = {}
     m_temp.start = maze.start
     m_temp.goal = maze.goal
     m_temp.map = np.copy(d_map)
@@ -35,19 +37,10 @@ def display_and_save_mazes(maze, best_runner=None, original_dijkstra_map=None):
 
     # runner génétique
     ax = axs[1, 0]
-    runner_on_maze = maze.maze.copy()
-    cell = list(best_runner.get_start())
-    path = best_runner.get_path()
-    for direction in path:
-        if direction >= 0: # mouvement valide
-            move = maze.cardinal[direction]
-            next_x, next_y = cell[0] + move[0], cell[1] + move[1]
-            if 0 <= next_x < maze.size and 0 <= next_y < maze.size: # dans le labyrinthe
-                runner_on_maze[cell[0]][cell[1]] = [0, 255, 0] # marque le chemin du runner en vert
-                cell[0], cell[1] = next_x, next_y        
-    runner_on_maze[cell[0]][cell[1]] = [0, 255, 0] # marque la dernière position du runner
-    runner_on_maze[maze.goal[0]][maze.goal[1]] = [255, 0, 0] # but en rouge
-    runner_on_maze[maze.start[0]][maze.start[1]] = [0, 0, 255] # départ en bleu
+    renderer = Renderer(maze)
+    renderer.add_runner(best_runner) # chemin du runner en vert
+    renderer.add_endpoints() # but en rouge, départ en bleu
+    runner_on_maze = renderer.render()
     ax.imshow(runner_on_maze)
     ax.set_title('genetic')
     ax.set_xticks([])
@@ -76,8 +69,9 @@ def display_and_save_stats(ga):
     fig.suptitle('Statistiques de l\'Évolution Génétique', fontsize=16)
 
     # Graphique de la fitness
-    ax1.plot(ga.best_fitness_history, label='Meilleure Fitness')
-    ax1.plot(ga.fitness_avg_history, label='Fitness Moyenne')
+    metrics = ga.get_metrics()
+    ax1.plot(*metrics.series("best_fitness"), label='Meilleure Fitness')
+    ax1.plot(*metrics.series("fitness_avg"), label='Fitness Moyenne')
     ax1.set_xlabel('Générations')
     ax1.set_ylabel('Fitness')
     ax1.set_title('Évolution de la Fitness')
@@ -85,7 +79,7 @@ def display_and_save_stats(ga):
     ax1.grid(True)
 
     # Graphique de la longueur du chemin
-    ax2.plot(ga.length_history, label='Longueur Moyenne du Chemin', color='orange')
+    ax2.plot(*metrics.series("length"), label='Longueur Moyenne du Chemin', color='orange')
     ax2.set_xlabel('Générations')
     ax2.set_ylabel('Longueur')
     ax2.set_title('Longueur Moyenne du Chemin des Runners')
@@ -99,15 +93,15 @@ def display_and_save_stats(ga):
 def main():
     # Configuration
     MAZE_SIZE = 100 
+    MAZE_SEED = 0 # même graine -> même labyrinthe, rechargé depuis le cache
+    CACHE_DIR = "maze_cache"
     RUNNER_LENGTH = MAZE_SIZE * MAZE_SIZE
     POP_SIZE = 200
     MAX_GEN = 5000
     MUTATION_RATE = 0.1
     SELECTION_RATE = 0.5
 
-    maze = Maze(MAZE_SIZE)
-    maze.generate()
-    maze.solve_from_random_coordonnates()
+    maze = MazeCache(CACHE_DIR).get(MAZE_SIZE, MAZE_SEED)
     original_dijkstra_map = np.copy(maze.map)
     print("\n--- lancement des générations ---")
     ga = GeneticAlgo(maze, RUNNER_LENGTH, POP_SIZE, MAX_GEN, MUTATION_RATE, SELECTION_RATE)